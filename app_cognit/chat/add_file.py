@@ -1,3 +1,4 @@
+import hashlib
 import streamlit as st
 import pandas as pd
 from io import StringIO
@@ -5,8 +6,13 @@ from uuid import uuid4
 from streamlit_option_menu import option_menu
 from langchain_community.document_loaders import CSVLoader, PyPDFLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_mistralai import MistralAIEmbeddings
-from pinecone.grpc import PineconeGRPC as Pinecone
+from pypdf import PdfReader
+from chat.chunk_store import chunk_store
+from chat.documents import ingest_file, manifest
+from chat.ingestion import iter_chunks
+from chat.upload_cache import upload_cache, upload_key
+from chat.vector_store import get_vector_store
+from clients import get_embeddings
 import psycopg2
 from psycopg2 import sql
 import os
@@ -17,17 +23,11 @@ load_dotenv()
 
 DB_CONFIG = st.secrets["postgresql"]
 
-# 🔹 Configuração do Pinecone
-PINECONE_API_KEY = st.secrets["PINECONE_API_KEY"]  
-PINECONE_HOST = st.secrets["PINECONE_HOST"]
-BATCH_SIZE = 400  
+# 🔹 Índice de vetores configurado nos secrets (Pinecone ou local)
+vector_store = get_vector_store()
 
-# 🔹 Inicializar Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(host=PINECONE_HOST)
-
-# 🔹 Inicializar modelo de embeddings da Mistral
-embed_model = MistralAIEmbeddings(model="mistral-embed")
+# 🔹 Modelo de embeddings da Mistral (com cache compartilhado entre usuários), criado uma vez por processo
+embed_model = get_embeddings()
 
 # 🔹 Usuário autenticado
 user_email = st.session_state.get("user_email", None)
@@ -59,73 +59,133 @@ def cleanup_temp_file(temp_file_path):
     except Exception as e:
         st.warning(f"⚠️ Não foi possível remover o arquivo temporário: {e}")
 
-if uploaded_file:
-    preview_text = ""  # Variável para armazenar a pré-visualização
-    documents = []  # Variável para armazenar chunks
+# 🔹 Configurações do splitter por tipo de arquivo: (chunk_size, chunk_overlap)
+SPLITTER_SETTINGS = {"CSV": (200, 50), "PDF": (1000, 100), "TXT": (400, 40)}
+
+# 🔹 Unidade percorrida pelo loader em cada tipo, para o progresso
+PAGE_LABELS = {"CSV": "Linha", "PDF": "Página", "TXT": "Arquivo"}
+
+def make_loader(file_type, file_path):
+    """Retorna o loader e o splitter usados para cada tipo de arquivo."""
+    chunk_size, chunk_overlap = SPLITTER_SETTINGS[file_type]
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if file_type == "CSV":
+        return CSVLoader(file_path=file_path), text_splitter
+    if file_type == "PDF":
+        return PyPDFLoader(file_path), text_splitter
+    return TextLoader(file_path, encoding="utf-8"), text_splitter
 
+def write_temp_file(content):
+    """Salva o conteúdo do upload em um arquivo temporário para os loaders."""
     temp_dir = "temp_uploads"
     os.makedirs(temp_dir, exist_ok=True)
     temp_file_path = os.path.join(temp_dir, f"{uuid4()}.{file_type.lower()}")
-
     with open(temp_file_path, "wb") as f:
-        f.write(uploaded_file.getvalue())
+        f.write(content)
+    return temp_file_path
+
+def parse_upload(content):
+    """
+    Processa o upload uma única vez e retorna a entrada do cache e o tamanho do seu texto.
 
+    Os chunks são guardados para o envio enquanto couberem no cache; documentos
+    maiores guardam apenas a pré-visualização e são processados em streaming no envio.
+    """
+    temp_file_path = write_temp_file(content)
     try:
+        entry = {"preview_frame": None}
         if file_type == "CSV":
-            dataframe = pd.read_csv(uploaded_file)
-            st.write("📋 **Pré-visualização do CSV:**")
-            st.dataframe(dataframe.head())
-
-            loader = CSVLoader(file_path=temp_file_path)
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=50)
-            documents = loader.load_and_split(text_splitter=text_splitter)
-
+            dataframe = pd.read_csv(temp_file_path)
+            entry["preview_frame"], total_pages = dataframe.head(), len(dataframe)
         elif file_type == "PDF":
-            with st.spinner("🔍 Carregando arquivo PDF..."):
-                loader = PyPDFLoader(temp_file_path)
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-                documents = loader.load_and_split(text_splitter=text_splitter)
-
-        elif file_type == "TXT":
-            with st.spinner("📄 Carregando arquivo TXT..."):
-                loader = TextLoader(temp_file_path, encoding="utf-8")
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=40)
-                documents = loader.load_and_split(text_splitter=text_splitter)
-    
-        # 🔹 Pré-visualizar apenas o primeiro chunk
-        if documents:
-            preview_text = """
-""".join([doc.page_content[:500] for doc in documents[:5]])
+            total_pages = len(PdfReader(temp_file_path).pages)
+        else:
+            total_pages = 1
+        entry["total_pages"] = total_pages
+
+        progress = st.progress(0.0)
+        loader, text_splitter = make_loader(file_type, temp_file_path)
+        chunks, size = [], 0
+        for chunk in iter_chunks(loader, text_splitter, on_page=lambda done: progress.progress(
+                min(done / total_pages, 1.0), text=f"{PAGE_LABELS[file_type]} {done}/{total_pages}")):
+            chunks.append(chunk)
+            size += len(chunk.page_content)
+            if size > upload_cache.max_entry_chars:
+                break
+        progress.empty()
+
+        entry["preview"] = chunks[:5]
+        if size > upload_cache.max_entry_chars:
+            entry["chunks"] = None
+            size = sum(len(chunk.page_content) for chunk in entry["preview"])
+        else:
+            entry["chunks"] = chunks
+        return entry, size
+    finally:
+        cleanup_temp_file(temp_file_path)
 
-        st.write(f"📄 **Pré-visualização do {file_type}:**")
-        st.text(preview_text + "..." if len(preview_text) > 500 else preview_text)
+if uploaded_file:
+    preview_text = ""  # Variável para armazenar a pré-visualização
 
-        # 🔹 Botão para processar o arquivo
-        if st.button(f"🚀 Enviar {file_type} para DataStore | 🪙50"):
+    # 🔹 O upload é processado uma vez e reaproveitado nas próximas execuções da página (pré-visualização e envio)
+    content = uploaded_file.getvalue()
+    cache_key = upload_key(content, file_type, *SPLITTER_SETTINGS[file_type])
+    parsed = upload_cache.get(cache_key)
+    if parsed is None:
+        parsed, size = parse_upload(content)
+        upload_cache.put(cache_key, parsed, size)
+
+    if parsed["preview_frame"] is not None:
+        st.write("📋 **Pré-visualização do CSV:**")
+        st.dataframe(parsed["preview_frame"])
+
+    # 🔹 Pré-visualizar apenas os primeiros chunks
+    if parsed["preview"]:
+        preview_text = """
+""".join([doc.page_content[:500] for doc in parsed["preview"]])
+
+    st.write(f"📄 **Pré-visualização do {file_type}:**")
+    st.text(preview_text + "..." if len(preview_text) > 500 else preview_text)
+
+    # 🔹 Botão para processar o arquivo
+    if st.button(f"🚀 Enviar {file_type} para DataStore | 🪙50"):
+        # 🔹 Cópia exata de um arquivo já enviado: não duplica o conteúdo no DataStore
+        content_hash = hashlib.sha256(content).hexdigest()
+        existing = manifest.find_copy(user_uid, content_hash)
+        if existing:
+            st.warning(f"⚠️ Este arquivo já está nos seus documentos como **{existing['name']}**. Exclua-o em Meus Arquivos para enviá-lo novamente.")
+        else:
+            temp_file_path = None
             try:
                 with st.spinner("📄 Processando arquivo e enviando para o DataStore..."):
-                    texts = [doc.page_content for doc in documents]
-                    metadatas = [{"source": uploaded_file.name, "source_text": doc.page_content, "original_source": uploaded_file.name, **doc.metadata} for doc in documents]
-                    embeddings = embed_model.embed_documents(texts)
+                    progress = st.progress(0.0)
+                    total_pages = parsed["total_pages"]
+
+                    def on_page(done):
+                        progress.progress(min(done / total_pages, 1.0), text=f"{PAGE_LABELS[file_type]} {done}/{total_pages}")
 
-                    data = [
-                        {"id": str(uuid4()), "values": emb, "metadata": meta}
-                        for emb, meta in zip(embeddings, metadatas)
-                    ]
+                    if parsed["chunks"] is not None:
+                        chunks = parsed["chunks"]
 
-                    def chunker(seq, batch_size):
-                        return (seq[pos:pos + batch_size] for pos in range(0, len(seq), batch_size))
+                        def on_progress(sent):
+                            progress.progress(sent / len(chunks), text=f"{sent}/{len(chunks)} trechos enviados")
+                    else:
+                        # 🔹 Documento grande: as páginas são lidas sob demanda, só quando há espaço nos lotes
+                        temp_file_path = write_temp_file(content)
+                        loader, text_splitter = make_loader(file_type, temp_file_path)
+                        chunks, on_progress = iter_chunks(loader, text_splitter, on_page=on_page), None
 
-                    async_results = [
-                        index.upsert(vectors=chunk, namespace=user_uid, async_req=True)
-                        for chunk in chunker(data, batch_size=BATCH_SIZE)
-                    ]
-                    [async_result.result() for async_result in async_results]
+                    # 🔹 O arquivo entra no manifesto (Meus Arquivos) e os chunks recebem ids derivados do documento
+                    document = ingest_file(chunks, vector_store, embed_model, chunk_store, user_uid, uploaded_file.name,
+                                           file_type, len(content), content_hash, on_progress=on_progress)
 
-                    st.success(f"✅ {file_type} enviado com sucesso para o DataStore")
+                    st.success(f"✅ {file_type} enviado com sucesso para o DataStore ({document['chunk_count']} trechos)")
+                    if document["duplicates"]:
+                        st.info(f"♻️ {document['duplicates']} trechos repetidos foram ignorados.")
 
             except Exception as e:
                 st.error(f"⚠️ Erro ao enviar arquivo: {e}")
-    
-    finally:
-        cleanup_temp_file(temp_file_path)
+
+            finally:
+                if temp_file_path:
+                    cleanup_temp_file(temp_file_path)
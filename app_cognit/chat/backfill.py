@@ -0,0 +1,95 @@
+"""
+Migra para o manifesto (chat.documents) os arquivos enviados antes dele.
+
+Esses vetores têm ids aleatórios (sem "#") e o nome do arquivo nos metadados
+("original_source" ou "source"), então não aparecem em Meus Arquivos e não
+podem ser excluídos pelo manifesto, embora continuem nas respostas do chat.
+Para cada arquivo antigo é criado um documento no manifesto, e seus vetores
+são regravados com os ids derivados dele ({id}#{i}), com o texto no chunk
+store; os vetores e textos antigos são removidos em seguida.
+
+Uso (a partir do diretório do app, onde ficam os secrets do Streamlit):
+    python -m chat.backfill                  # todos os namespaces do índice
+    python -m chat.backfill --users uid1 uid2
+"""
+import argparse
+from pathlib import PurePath
+
+from chat.chunk_store import chunk_store
+from chat.documents import manifest
+from chat.ingestion import batched, chunk_id, vector_metadata
+from chat.vector_store import get_vector_store
+
+# Vetores lidos e regravados por vez
+BACKFILL_BATCH_SIZE = 100
+
+# Tipos aceitos em add_file, pela extensão do arquivo
+FILE_TYPES = {".csv": "CSV", ".pdf": "PDF", ".txt": "TXT"}
+
+
+def legacy_ids(vector_store, namespace: str):
+    """Ids de vetores que não pertencem a nenhum documento do manifesto, em lotes."""
+    legacy = (vector_id for page in vector_store.list_ids(namespace) for vector_id in page if "#" not in vector_id)
+    yield from batched(legacy, BACKFILL_BATCH_SIZE)
+
+
+def backfill_namespace(vector_store, chunk_store, user_uid: str) -> dict[str, int]:
+    """
+    Cria documentos no manifesto para os vetores antigos do usuário e os regrava com ids do manifesto.
+
+    O total de ids de cada documento é gravado antes de cada upsert, como na
+    ingestão, então o que uma migração interrompida já regravou pode ser
+    excluído pela página; o que faltou é migrado (como outro documento com o
+    mesmo nome) ao rodar de novo.
+
+    Returns:
+        dict: Chunks migrados por nome de arquivo
+    """
+    documents = {}  # nome -> [id do documento, chunks atribuídos]
+
+    for ids in legacy_ids(vector_store, user_uid):
+        vectors = vector_store.fetch(ids, user_uid)
+        texts = chunk_store.get_many([vector["id"] for vector in vectors])
+        migrated, new_texts = [], {}
+
+        for vector in vectors:
+            metadata = vector["metadata"]
+            name = metadata.get("original_source") or metadata.get("source") or "Desconhecido"
+            text = texts.get(vector["id"]) or metadata.get("source_text", "")
+
+            if name not in documents:
+                file_type = FILE_TYPES.get(PurePath(name).suffix.lower(), "Desconhecido")
+                documents[name] = [manifest.create(user_uid, name, file_type, 0), 0]
+            document = documents[name]
+            new_id = chunk_id(document[0], document[1])
+            document[1] += 1
+
+            migrated.append({"id": new_id, "values": vector["values"], "metadata": vector_metadata(metadata, name)})
+            new_texts[new_id] = text
+
+        for document_id, assigned in documents.values():
+            manifest.set_chunk_count(document_id, assigned)
+        chunk_store.put_many(user_uid, new_texts)
+        vector_store.upsert(migrated, user_uid).result()
+        vector_store.delete(ids, user_uid).result()
+        chunk_store.delete(ids)
+
+    for document_id, assigned in documents.values():
+        manifest.finish(document_id, assigned)
+    return {name: assigned for name, (_, assigned) in documents.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migra os arquivos antigos de cada usuário para o manifesto")
+    parser.add_argument("--users", nargs="+", help="Namespaces (uids) a migrar; padrão: todos")
+    args = parser.parse_args()
+
+    vector_store = get_vector_store()
+    for user_uid in args.users or vector_store.namespaces():
+        migrated = backfill_namespace(vector_store, chunk_store, user_uid)
+        for name, count in migrated.items():
+            print(f"{user_uid}: {name} ({count} chunks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import streamlit as st
-from pinecone import Pinecone
-from langchain_mistralai import MistralAIEmbeddings
-from mistralai import Mistral
+from chat.chunk_store import chunk_store
+from chat.vector_store import get_vector_store
+from clients import get_embeddings, get_mistral
 from mistralai.models.sdkerror import SDKError
 import os
 import time
@@ -9,20 +9,29 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# 🔹 Configuração do Pinecone
-PINECONE_API_KEY = st.secrets["PINECONE_API_KEY"]
-PINECONE_HOST = st.secrets["PINECONE_HOST"]
+# 🔹 Índice de vetores configurado nos secrets (Pinecone ou local)
+vector_store = get_vector_store()
 
-# 🔹 Inicializar Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(host=PINECONE_HOST)
+# 🔹 Modelo de embeddings da Mistral (com cache), compartilhado pelo processo
+embed_model = get_embeddings()
+
+
+def delta_text(event) -> str:
+    """Texto novo de um evento do streaming da Mistral (o conteúdo pode vir como string ou lista de partes)."""
+    content = event.data.choices[0].delta.content if event.data.choices else None
+    if not content:
+        return ""
+    if isinstance(content, str):
+        return content
+    return "".join(getattr(part, "text", "") for part in content)
+
+
+def interrupted(partial: str, fallback: str) -> str:
+    """Resposta a guardar quando o streaming falha: o texto já exibido com um aviso, ou a mensagem padrão."""
+    if not partial:
+        return fallback
+    return f"{partial}\n\n_⚠️ A resposta foi interrompida por um erro. Tente novamente para obtê-la completa._"
 
-# 🔹 Inicializar modelo de embeddings da Mistral
-MISTRAL_API_KEY = st.secrets["MISTRAL_API_KEY"]
-embed_model = MistralAIEmbeddings(
-    model="mistral-embed",
-    mistral_api_key=MISTRAL_API_KEY
-)
 
 # 🔹 Usuário autenticado
 user_email = st.session_state.get("user_email", None)
@@ -50,22 +59,25 @@ if user_query := st.chat_input("Digite sua pergunta sobre os documentos..."):
     st.chat_message("user").markdown(user_query)
     st.session_state.messages.append({"role": "user", "content": user_query})
 
+    chat_messages = None
     with st.spinner("🔍 Buscando informações nos seus documentos..."):
         try:
             # 🔹 Gerar embedding da consulta
             xq = embed_model.embed_query(user_query)
 
-            # 🔹 Buscar documentos relevantes no Pinecone
-            res = index.query(vector=xq, top_k=12, include_metadata=True, namespace=user_uid)  # 🔹 Aumentamos o `top_k`
+            # 🔹 Buscar documentos relevantes no índice
+            matches = vector_store.query(vector=xq, top_k=12, namespace=user_uid)  # 🔹 Aumentamos o `top_k`
 
             # 🔹 Verificar se há resultados
-            if not res["matches"]:
+            if not matches:
                 st.warning("⚠️ Nenhum resultado encontrado nos seus dados.")
-                contexts = ["Nenhum contexto relevante encontrado."]
+                structured_context = "Nenhum contexto relevante encontrado."
             else:
                 # 🔹 Ordenação refinada para priorizar documentos mais relevantes
-                results = sorted(res["matches"], key=lambda x: x["score"], reverse=True)
-                contexts = [item["metadata"].get("source_text", "Texto não disponível") for item in results]
+                results = sorted(matches, key=lambda x: x["score"], reverse=True)
+                # 🔹 Texto dos trechos buscado em lote no chunk store (vetores antigos ainda trazem o texto nos metadados)
+                texts = chunk_store.get_many([item["id"] for item in results])
+                contexts = [texts.get(item["id"]) or item["metadata"].get("source_text", "Texto não disponível") for item in results]
                 sources = [item["metadata"].get("source", "Fonte desconhecida") for item in results]
 
                 # 🔹 Gerar trechos de resposta sem truncamento excessivo
@@ -86,43 +98,52 @@ if user_query := st.chat_input("Digite sua pergunta sobre os documentos..."):
 
             Pergunta: {user_query}
             """})
-
-            # 🔹 Inicializar cliente Mistral
-            client = Mistral(api_key=MISTRAL_API_KEY)
-
-            # 🔹 Tentativa com retries automáticos para erro 429
-            max_retries = 3
-            retry_delay = 5  # segundos
-            for attempt in range(max_retries):
-                try:
-                    response = client.chat.complete(
-                        model="mistral-large-latest",
-                        temperature=0,
-                        messages=[{"role": "system", "content": "Você é um assistente especializado em responder perguntas com base nos documentos fornecidos."}] + conversation_history,
-                    )
-                    bot_response = response.choices[0].message.content
-                    break  # Sai do loop se a requisição for bem-sucedida
-                except SDKError as e:
-                    if "429" in str(e):
-                        st.warning(f"🚦 Limite de requisições excedido. Tentando novamente ({attempt+1}/{max_retries})...")
-                        time.sleep(retry_delay)
-                    else:
-                        raise e
-            else:
-                st.error("⚠️ O serviço atingiu o limite de requisições. Por favor, tente novamente mais tarde.")
-                bot_response = "Não foi possível obter uma resposta no momento. Tente novamente mais tarde."
-
-        except SDKError:
-            st.error("⚠️ Erro ao acessar o modelo de IA. Tente novamente mais tarde.")
-            bot_response = "Não foi possível processar sua solicitação devido a um erro no servidor."
+            chat_messages = [{"role": "system", "content": "Você é um assistente especializado em responder perguntas com base nos documentos fornecidos."}] + conversation_history
 
         except Exception:
             st.error("⚠️ Ocorreu um erro inesperado. Tente novamente mais tarde.")
             bot_response = "Houve um erro ao processar sua pergunta. Tente novamente."
 
-    # Exibir resposta do assistente
+    # Exibir resposta do assistente, token a token, conforme o modelo gera
     with st.chat_message("assistant"):
-        st.markdown(bot_response)
+        placeholder = st.empty()
+        if chat_messages is not None:
+            bot_response = ""
+            try:
+                # 🔹 Cliente Mistral compartilhado (conexões reaproveitadas entre perguntas)
+                client = get_mistral()
+
+                # 🔹 Tentativa com retries automáticos para erro 429 (só antes do primeiro token; depois disso
+                #    repetir a requisição duplicaria o texto já exibido)
+                max_retries = 3
+                retry_delay = 5  # segundos
+                for attempt in range(max_retries):
+                    try:
+                        placeholder.markdown("▌")
+                        with client.chat.stream(model="mistral-large-latest", temperature=0, messages=chat_messages) as events:
+                            for event in events:
+                                bot_response += delta_text(event)
+                                placeholder.markdown(bot_response + "▌")
+                        break  # Sai do loop quando a resposta termina
+                    except SDKError as e:
+                        if "429" in str(e) and not bot_response:
+                            placeholder.warning(f"🚦 Limite de requisições excedido. Tentando novamente ({attempt+1}/{max_retries})...")
+                            time.sleep(retry_delay)
+                        else:
+                            raise e
+                else:
+                    st.error("⚠️ O serviço atingiu o limite de requisições. Por favor, tente novamente mais tarde.")
+                    bot_response = "Não foi possível obter uma resposta no momento. Tente novamente mais tarde."
+
+            except SDKError:
+                st.error("⚠️ Erro ao acessar o modelo de IA. Tente novamente mais tarde.")
+                bot_response = interrupted(bot_response, "Não foi possível processar sua solicitação devido a um erro no servidor.")
+
+            except Exception:
+                st.error("⚠️ Ocorreu um erro inesperado. Tente novamente mais tarde.")
+                bot_response = interrupted(bot_response, "Houve um erro ao processar sua pergunta. Tente novamente.")
+
+        placeholder.markdown(bot_response)
 
     # Adicionar resposta ao histórico
     st.session_state.messages.append({"role": "assistant", "content": bot_response})
@@ -0,0 +1,79 @@
+import zlib
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import execute_values
+
+# 🔹 Configuração do Banco de Dados PostgreSQL
+DB_CONFIG = st.secrets["postgresql"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    text BYTEA NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_namespace_idx ON chunks (namespace);
+"""
+
+
+class ChunkStore:
+    """
+    Texto dos chunks indexado pelo id do vetor no Pinecone.
+
+    O texto fica fora dos metadados do vetor (comprimido com zlib), então
+    upserts e consultas trafegam apenas ids e campos de filtro; o chat busca
+    o texto em lote somente para os resultados finais.
+    """
+
+    def __init__(self, db_config=DB_CONFIG):
+        self.db_config = db_config
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db_config)
+        if not self._schema_ready:
+            with conn, conn.cursor() as cursor:
+                cursor.execute(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def put_many(self, namespace: str, texts: dict[str, str]) -> None:
+        """Guarda os textos de `texts` (id do vetor -> texto) no namespace do usuário."""
+        if not texts:
+            return
+        conn = self._connect()
+        try:
+            with conn, conn.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    "INSERT INTO chunks (id, namespace, text) VALUES %s ON CONFLICT (id) DO UPDATE SET text = EXCLUDED.text",
+                    [(chunk_id, namespace, zlib.compress(text.encode("utf-8"))) for chunk_id, text in texts.items()],
+                )
+        finally:
+            conn.close()
+
+    def get_many(self, ids: list[str]) -> dict[str, str]:
+        """Retorna os textos encontrados para `ids` (id -> texto)."""
+        if not ids:
+            return {}
+        conn = self._connect()
+        try:
+            with conn, conn.cursor() as cursor:
+                cursor.execute("SELECT id, text FROM chunks WHERE id = ANY(%s)", (list(ids),))
+                return {chunk_id: zlib.decompress(bytes(text)).decode("utf-8") for chunk_id, text in cursor.fetchall()}
+        finally:
+            conn.close()
+
+    def delete(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        conn = self._connect()
+        try:
+            with conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM chunks WHERE id = ANY(%s)", (list(ids),))
+        finally:
+            conn.close()
+
+
+chunk_store = ChunkStore()
@@ -0,0 +1,80 @@
+import hashlib
+import re
+
+import numpy as np
+
+# Fingerprints a até esta distância de Hamming (em 64 bits) são considerados quase iguais
+MAX_DISTANCE = 4
+
+# Com 5 faixas, dois fingerprints a até 4 bits de distância coincidem em pelo menos uma faixa
+BANDS = MAX_DISTANCE + 1
+BAND_BITS = 64 // BANDS
+
+# Chunks curtos (ex.: linhas de CSV) variam poucos bits mesmo com conteúdo diferente: só cópias exatas são removidas
+MIN_WORDS = 20
+
+SHINGLE_SIZE = 2
+
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int:
+    """
+    SimHash de 64 bits do texto, calculado sobre bigramas de palavras normalizadas.
+
+    Textos que diferem em poucas palavras (cabeçalhos e rodapés repetidos,
+    sobreposição do splitter, linhas padrão de CSV) têm fingerprints a
+    poucos bits de distância.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    weights = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int(np.packbits(weights > 0, bitorder="little").view("<u8")[0])
+
+
+class NearDuplicateFilter:
+    """
+    Remove chunks quase duplicados antes do embedding.
+
+    Compara o SimHash de cada chunk com os já vistos no documento. A busca
+    usa um índice por faixas de bits, então cada chunk é comparado só com os
+    poucos candidatos que compartilham alguma faixa.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.bands = [{} for _ in range(BANDS)]
+        self.dropped = 0
+
+    @staticmethod
+    def _band_keys(fingerprint: int):
+        mask = (1 << BAND_BITS) - 1
+        return [(fingerprint >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+    def add(self, fingerprint: int) -> None:
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(key, []).append(fingerprint)
+
+    def is_duplicate(self, fingerprint: int, max_distance: int | None = None) -> bool:
+        max_distance = self.max_distance if max_distance is None else max_distance
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            for other in band.get(key, ()):
+                if (fingerprint ^ other).bit_count() <= max_distance:
+                    return True
+        return False
+
+    def filter(self, chunks):
+        """Produz apenas os chunks que não são quase duplicados de outros já vistos."""
+        for chunk in chunks:
+            fingerprint = simhash(chunk.page_content)
+            short = len(_WORD.findall(chunk.page_content)) < MIN_WORDS
+            if self.is_duplicate(fingerprint, 0 if short else None):
+                self.dropped += 1
+                continue
+            self.add(fingerprint)
+            yield chunk
@@ -0,0 +1,231 @@
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import RealDictCursor
+
+from chat.dedup import NearDuplicateFilter
+from chat.ingestion import chunk_id, ingest_documents
+
+# 🔹 Limite de ids por requisição de exclusão no Pinecone e exclusões simultâneas
+DELETE_BATCH_SIZE = 1000
+DELETE_CONCURRENCY = 8
+
+# 🔹 Documento "ingesting" sem novos lotes há mais tempo que isso: o envio foi interrompido (processo reiniciado)
+INGEST_STALE_AFTER = timedelta(minutes=10)
+
+# 🔹 Configuração do Banco de Dados PostgreSQL
+DB_CONFIG = st.secrets["postgresql"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    user_uid TEXT NOT NULL,
+    name TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ingesting',
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    size_bytes BIGINT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS documents_user_idx ON documents (user_uid, created_at DESC);
+CREATE INDEX IF NOT EXISTS documents_user_type_idx ON documents (user_uid, file_type, created_at DESC);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;
+CREATE INDEX IF NOT EXISTS documents_user_hash_idx ON documents (user_uid, content_hash);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+"""
+
+
+def chunk_ids(document: dict) -> list[str]:
+    """Ids de todos os chunks do documento, derivados do manifesto: {id}#0 até {id}#{chunk_count - 1}."""
+    return [chunk_id(document["id"], position) for position in range(document["chunk_count"])]
+
+
+def ingest_in_progress(document: dict) -> bool:
+    """Se o documento ainda está sendo enviado (em "ingesting" e com lotes recentes)."""
+    return document["status"] == "ingesting" and datetime.now(timezone.utc) - document["updated_at"] < INGEST_STALE_AFTER
+
+
+class DocumentManifest:
+    """
+    Manifesto dos documentos enviados por cada usuário, no PostgreSQL.
+
+    A ingestão registra cada arquivo com nome, tipo, tamanho e quantidade de
+    chunks; como os ids dos chunks são derivados do id do documento, a
+    listagem e a exclusão não dependem de varrer o índice de vetores.
+    """
+
+    def __init__(self, db_config=DB_CONFIG):
+        self.db_config = db_config
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db_config)
+        if not self._schema_ready:
+            with conn, conn.cursor() as cursor:
+                cursor.execute(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _execute(self, query: str, params=(), fetch: str | None = None):
+        conn = self._connect()
+        try:
+            with conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                if fetch == "one":
+                    return cursor.fetchone()
+                if fetch == "all":
+                    return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def create(self, user_uid: str, name: str, file_type: str, size_bytes: int, content_hash: str | None = None) -> str:
+        """Registra um documento antes da ingestão e retorna seu id."""
+        document_id = str(uuid.uuid4())
+        self._execute(
+            "INSERT INTO documents (id, user_uid, name, file_type, size_bytes, content_hash) VALUES (%s, %s, %s, %s, %s, %s)",
+            (document_id, user_uid, name, file_type, size_bytes, content_hash),
+        )
+        return document_id
+
+    def set_status(self, document_id: str, status: str) -> None:
+        self._execute("UPDATE documents SET status = %s, updated_at = now() WHERE id = %s", (status, document_id))
+
+    def set_chunk_count(self, document_id: str, chunk_count: int) -> None:
+        """Registra quantos ids de chunk já foram atribuídos durante a ingestão (limite para a exclusão)."""
+        self._execute(
+            "UPDATE documents SET chunk_count = %s, updated_at = now() WHERE id = %s", (chunk_count, document_id)
+        )
+
+    def finish(self, document_id: str, chunk_count: int, status: str = "ready") -> None:
+        """
+        Grava a quantidade de chunks do documento ao fim da ingestão.
+
+        Em caso de falha, `chunk_count` deve incluir todos os ids já atribuídos,
+        para que a exclusão também remova os vetores enviados parcialmente.
+        """
+        self._execute(
+            "UPDATE documents SET chunk_count = %s, status = %s, updated_at = now() WHERE id = %s",
+            (chunk_count, status, document_id),
+        )
+
+    def get(self, user_uid: str, document_id: str) -> dict | None:
+        return self._execute(
+            "SELECT * FROM documents WHERE user_uid = %s AND id = %s", (user_uid, document_id), fetch="one"
+        )
+
+    def find_copy(self, user_uid: str, content_hash: str) -> dict | None:
+        """Documento do usuário com o mesmo conteúdo (SHA-256 do arquivo), já enviado ou em envio."""
+        return self._execute(
+            """
+            SELECT * FROM documents
+            WHERE user_uid = %s AND content_hash = %s AND status IN ('ingesting', 'ready')
+            ORDER BY created_at DESC LIMIT 1
+            """,
+            (user_uid, content_hash), fetch="one",
+        )
+
+    def find(self, user_uid: str, file_type: str | None = None, limit: int = 20, offset: int = 0) -> list[dict]:
+        """Lista os documentos do usuário, mais recentes primeiro, opcionalmente filtrados por tipo."""
+        return self._execute(
+            """
+            SELECT * FROM documents
+            WHERE user_uid = %s AND (%s::text IS NULL OR file_type = %s)
+            ORDER BY created_at DESC
+            LIMIT %s OFFSET %s
+            """,
+            (user_uid, file_type, file_type, limit, offset), fetch="all",
+        )
+
+    def count(self, user_uid: str, file_type: str | None = None) -> int:
+        row = self._execute(
+            "SELECT COUNT(*) AS total FROM documents WHERE user_uid = %s AND (%s::text IS NULL OR file_type = %s)",
+            (user_uid, file_type, file_type), fetch="one",
+        )
+        return row["total"]
+
+    def file_types(self, user_uid: str) -> list[str]:
+        rows = self._execute(
+            "SELECT DISTINCT file_type FROM documents WHERE user_uid = %s ORDER BY file_type", (user_uid,), fetch="all"
+        )
+        return [row["file_type"] for row in rows]
+
+    def delete(self, user_uid: str, document_id: str) -> None:
+        self._execute("DELETE FROM documents WHERE user_uid = %s AND id = %s", (user_uid, document_id))
+
+
+manifest = DocumentManifest()
+
+
+def ingest_file(chunks, vector_store, embed_model, chunk_store, user_uid: str, name: str, file_type: str,
+                size_bytes: int, content_hash: str | None = None, on_progress=None) -> dict:
+    """
+    Registra o arquivo no manifesto e envia seus chunks com ids derivados do documento.
+
+    Chunks quase duplicados de outros do mesmo documento são descartados antes
+    do embedding. A deduplicação não atravessa documentos: cada um guarda
+    todo o seu conteúdo, então excluir um documento nunca remove texto de
+    outro. Cópias exatas de um arquivo são barradas antes, pelo `content_hash`
+    (DocumentManifest.find_copy).
+
+    O total de ids atribuídos é gravado no manifesto antes de cada lote ir ao
+    chunk store e ao índice. Se a ingestão falhar, o documento fica com status
+    "failed"; se o processo morrer, fica em "ingesting" até INGEST_STALE_AFTER.
+    Nos dois casos o `chunk_count` cobre tudo o que foi enviado, então
+    excluí-lo não deixa vetores órfãos.
+
+    Returns:
+        dict: Documento do manifesto após a ingestão, com "duplicates" (chunks descartados)
+    """
+    document_id = manifest.create(user_uid, name, file_type, size_bytes, content_hash)
+    duplicates = NearDuplicateFilter()
+    assigned = 0
+
+    def on_assign(count):
+        nonlocal assigned
+        manifest.set_chunk_count(document_id, count)
+        assigned = count
+
+    try:
+        sent = ingest_documents(duplicates.filter(chunks), vector_store, embed_model, chunk_store, namespace=user_uid,
+                                source_name=name, document_id=document_id, on_progress=on_progress,
+                                on_assign=on_assign)
+    except Exception:
+        manifest.finish(document_id, assigned, status="failed")
+        raise
+
+    manifest.finish(document_id, sent)
+    return {**manifest.get(user_uid, document_id), "duplicates": duplicates.dropped}
+
+
+def delete_document(vector_store, chunk_store, user_uid: str, document: dict) -> None:
+    """
+    Remove um documento inteiro: vetores, textos e, por último, a entrada no manifesto.
+
+    Os ids vêm do manifesto ({id}#0 até {id}#{chunk_count - 1}), relido aqui
+    para usar o total de ids mais recente, então nenhum vetor precisa ser
+    listado. Documentos ainda em envio não podem ser excluídos. As exclusões
+    no índice são enviadas em lotes assíncronos, com até DELETE_CONCURRENCY em
+    andamento. O documento fica como "deleting" até o fim; se algo falhar, ele
+    continua listado e a exclusão pode ser repetida sem deixar vetores órfãos.
+    """
+    document = manifest.get(user_uid, document["id"])
+    if document is None:
+        return
+    if ingest_in_progress(document):
+        raise ValueError("O documento ainda está sendo enviado; aguarde o fim do envio para excluí-lo.")
+    manifest.set_status(document["id"], "deleting")
+    ids = chunk_ids(document)
+
+    pending = deque()
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        pending.append(vector_store.delete(ids[start:start + DELETE_BATCH_SIZE], user_uid))
+        if len(pending) >= DELETE_CONCURRENCY:
+            pending.popleft().result()
+    for deletion in pending:
+        deletion.result()
+
+    chunk_store.delete(ids)
+    manifest.delete(user_uid, document["id"])
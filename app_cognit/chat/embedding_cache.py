@@ -0,0 +1,142 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_CACHE_PATH = Path("embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings (last_used);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza o texto do chunk (Unicode NFC e espaços) para que variações triviais compartilhem o embedding."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Chave do cache: hash do modelo e do texto normalizado."""
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Cache local de embeddings em SQLite, compartilhado entre usuários.
+
+    Os vetores são guardados em float32 e indexados por embedding_key(), então
+    o mesmo manual ou planilha enviado por vários usuários é embedado uma
+    única vez. Quando o banco passa de `max_bytes`, os vetores usados há mais
+    tempo são removidos.
+    """
+
+    def __init__(self, path: Path = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Retorna os vetores encontrados para `keys` e marca-os como usados agora."""
+        found = {}
+        conn = self._connect()
+        try:
+            with conn:
+                # Consultas em partes para respeitar o limite de parâmetros do SQLite
+                for start in range(0, len(keys), 500):
+                    part = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(part))
+                    rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part)
+                    for key, vector in rows:
+                        found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+                if found:
+                    conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                     [(time.time(), key) for key in found])
+        finally:
+            conn.close()
+        return found
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        """Guarda os vetores de `items` (chave -> vetor) e aplica o limite de tamanho."""
+        if not items:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()],
+                )
+            with self._lock:
+                self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total, count = conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0), COUNT(*) FROM embeddings").fetchone()
+        if total <= self.max_bytes or not count:
+            return
+
+        # Remove os menos usados até ficar em 90% do limite, evitando despejos a cada inserção
+        excess = total - int(self.max_bytes * 0.9)
+        to_remove = int(excess / (total / count)) + 1
+        with conn:
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (to_remove,),
+            )
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Modelo de embeddings que consulta o EmbeddingCache antes de chamar a API.
+
+    Só os textos ausentes do cache (e sem repetição) são enviados ao modelo;
+    a ordem e a quantidade dos vetores retornados são as mesmas da entrada.
+    """
+
+    def __init__(self, model: Embeddings, model_name: str, cache: EmbeddingCache | None = None):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        vectors = self.cache.get_many(list(set(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        if missing:
+            embeddings = self.model.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing, embeddings))
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        # O mistral-embed usa o mesmo embedding para consultas e documentos
+        return self.embed_documents([text])[0]
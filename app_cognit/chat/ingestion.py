@@ -0,0 +1,121 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+EMBED_BATCH_SIZE = 64
+EMBED_WORKERS = 3
+
+# Campos do loader mantidos nos metadados do vetor (página do PDF, linha do CSV); o resto é descartado
+METADATA_FIELDS = ("page", "row")
+
+
+def batched(items, size: int):
+    """Agrupa um iterável em listas de até `size` itens, sem materializá-lo inteiro."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_chunks(loader, text_splitter, on_page=None):
+    """
+    Carrega e divide o documento página a página, produzindo os chunks sob demanda.
+
+    Usa `lazy_load()` do loader, então só a página atual fica na memória; como
+    é um gerador, a próxima página só é lida quando o consumidor (por exemplo
+    ingest_documents, que limita os lotes em andamento) pede mais chunks.
+    O resultado é o mesmo de `loader.load_and_split(text_splitter)`.
+
+    Args:
+        loader: Loader do LangChain (PyPDFLoader, CSVLoader, TextLoader...)
+        text_splitter: Splitter aplicado a cada página
+        on_page: Chamado como on_page(páginas_processadas) ao fim de cada página
+    """
+    for page_number, page in enumerate(loader.lazy_load(), start=1):
+        yield from text_splitter.split_documents([page])
+        if on_page:
+            on_page(page_number)
+
+
+def vector_metadata(metadata: dict, source_name: str) -> dict:
+    """Metadados gravados no vetor: o nome do arquivo e apenas os campos de METADATA_FIELDS."""
+    return {"source": source_name, **{key: metadata[key] for key in METADATA_FIELDS if key in metadata}}
+
+
+def chunk_id(document_id: str, position: int) -> str:
+    """Id do vetor (e do texto no chunk store) do chunk na posição `position` do documento."""
+    return f"{document_id}#{position}"
+
+
+def ingest_documents(documents, vector_store, embed_model, chunk_store, namespace: str, source_name: str, document_id: str,
+                     batch_size: int = EMBED_BATCH_SIZE, max_workers: int = EMBED_WORKERS,
+                     on_progress=None, on_assign=None) -> int:
+    """
+    Gera os embeddings dos chunks e envia os vetores ao índice em pipeline.
+
+    Os chunks são processados em lotes de `batch_size`, com até `max_workers`
+    requisições de embedding simultâneas. Cada lote pronto é enviado com um
+    upsert assíncrono enquanto os próximos lotes ainda estão sendo gerados,
+    então o tempo total fica próximo da maior das duas etapas, e a memória
+    usada é proporcional ao tamanho do lote, não ao do documento.
+
+    Args:
+        documents: Iterável de Documents do LangChain (pode ser um gerador)
+        vector_store: Índice de vetores (chat.vector_store)
+        embed_model: Modelo de embeddings (embed_documents)
+        chunk_store: ChunkStore onde o texto de cada chunk é guardado pelo id do vetor
+        namespace: Namespace do usuário no índice
+        source_name: Nome do arquivo original, salvo nos metadados
+        document_id: Id do documento no manifesto; o chunk na posição i recebe o id "{document_id}#{i}"
+        batch_size: Chunks por requisição de embedding e por upsert
+        max_workers: Requisições de embedding (e upserts pendentes) simultâneas
+        on_progress: Chamado como on_progress(chunks_enviados) a cada lote
+        on_assign: Chamado como on_assign(ids_atribuídos) antes de cada lote ir ao chunk store e ao índice,
+            para que o total de ids já usados fique registrado mesmo se o processo morrer no meio
+
+    Returns:
+        int: Quantidade de chunks enviados
+    """
+    def embed(ids, batch):
+        embeddings = embed_model.embed_documents([doc.page_content for doc in batch])
+
+        # O texto vai para o chunk store antes do vetor, então toda busca encontra o texto dos resultados
+        chunk_store.put_many(namespace, {chunk_id: doc.page_content for chunk_id, doc in zip(ids, batch)})
+
+        # Metadados só com o nome do arquivo e a posição no documento (producer, caminho temporário etc. ficam de fora)
+        return [
+            {"id": chunk_id, "values": emb, "metadata": vector_metadata(doc.metadata, source_name)}
+            for chunk_id, emb, doc in zip(ids, embeddings, batch)
+        ]
+
+    embedding, upserts = deque(), deque()
+    sent = 0
+
+    def upsert_next():
+        nonlocal sent
+        vectors = embedding.popleft().result()
+        upserts.append(vector_store.upsert(vectors, namespace))
+        # Limita os upserts em andamento para não acumular lotes na memória
+        while len(upserts) > max_workers:
+            upserts.popleft().result()
+        sent += len(vectors)
+        if on_progress:
+            on_progress(sent)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        position = 0
+        for batch in batched(documents, batch_size):
+            ids = [chunk_id(document_id, position + i) for i in range(len(batch))]
+            position += len(batch)
+            if on_assign:
+                on_assign(position)
+            embedding.append(executor.submit(embed, ids, batch))
+            if len(embedding) >= max_workers:
+                upsert_next()
+
+        while embedding:
+            upsert_next()
+
+    for upsert in upserts:
+        upsert.result()
+
+    return sent
@@ -1,19 +1,16 @@
 import streamlit as st
-from pinecone.grpc import PineconeGRPC as Pinecone
 import os
-from collections import defaultdict
+from chat.chunk_store import chunk_store
+from chat.documents import delete_document, ingest_in_progress, manifest
+from chat.ingestion import chunk_id
+from chat.vector_store import get_vector_store
 from dotenv import load_dotenv
 
 # 🔹 Carregar variáveis de ambiente
 load_dotenv()
 
-# 🔹 Configuração do Pinecone
-PINECONE_API_KEY = st.secrets["PINECONE_API_KEY"]  
-PINECONE_HOST = st.secrets["PINECONE_HOST"]
-
-# 🔹 Inicializar Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(host=PINECONE_HOST)
+# 🔹 Índice de vetores configurado nos secrets (Pinecone ou local)
+vector_store = get_vector_store()
 
 # 🔹 Usuário autenticado
 user_email = st.session_state.get("user_email", None)
@@ -24,47 +21,46 @@ if not user_email or not user_uid:
 
 st.title("📂 Meus Arquivos")
 
-# 🔹 Buscar documentos do usuário no Pinecone
-with st.spinner("🔍 Carregando seus arquivos..."):
-    try:
-        response = index.query(vector=[0]*1024, top_k=10000, include_metadata=True, namespace=user_uid)
-        documentos = response.get("matches", [])
-    except Exception as e:
-        st.error(f"Erro ao buscar arquivos: {e}")
-        documentos = []
+PAGE_SIZE = 20
+
+# 🔹 Filtro por tipo e paginação direto no manifesto (sem consultar o índice de vetores)
+tipos = manifest.file_types(user_uid)
+tipo_selecionado = st.selectbox("Filtrar por tipo de arquivo:", ["Todos"] + tipos)
+filtro = None if tipo_selecionado == "Todos" else tipo_selecionado
+
+try:
+    total = manifest.count(user_uid, filtro)
+except Exception as e:
+    st.error(f"Erro ao buscar arquivos: {e}")
+    total = 0
+
+if total:
+    st.write(f"📄 Total de documentos armazenados: **{total}**")
 
-# 🔹 Agrupar chunks por documento original
-documentos_agrupados = defaultdict(list)
-for doc in documentos:
-    fonte = doc.get("metadata", {}).get("original_source", "Desconhecido")
-    documentos_agrupados[fonte].append(doc)
+    paginas = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1) if paginas > 1 else 1
+    documentos = manifest.find(user_uid, filtro, limit=PAGE_SIZE, offset=(pagina - 1) * PAGE_SIZE)
 
-# 🔹 Exibir documentos agrupados
-if documentos_agrupados:
-    st.write(f"📄 Total de documentos armazenados: **{len(documentos_agrupados)}**")
-    
-    # Criar filtro por tipo
-    tipos = list(set(doc["metadata"].get("file_type", "Desconhecido") for doc in documentos))
-    tipo_selecionado = st.selectbox("Filtrar por tipo de arquivo:", ["Todos"] + tipos)
-    
-    for fonte, docs in documentos_agrupados.items():
-        if tipo_selecionado != "Todos" and docs[0].get("metadata", {}).get("file_type") != tipo_selecionado:
-            continue
-        
-        texto_preview = docs[0]["metadata"].get("source_text", "Sem conteúdo")[0:300] + "..."
-        
-        with st.expander(f"📜 {fonte} ({len(docs)} chunks)"):
+    # 🔹 Preview: primeiro chunk de cada documento da página, em uma única consulta
+    previews = chunk_store.get_many([chunk_id(doc["id"], 0) for doc in documentos if doc["chunk_count"]])
+
+    for doc in documentos:
+        enviando = ingest_in_progress(doc)
+        status = " ⏳ enviando" if enviando else {"ready": "", "deleting": " ⚠️ exclusão incompleta"}.get(doc["status"], " ⚠️ envio incompleto")
+        texto_preview = previews.get(chunk_id(doc["id"], 0), "Sem conteúdo")[0:300] + "..."
+
+        with st.expander(f"📜 {doc['name']} ({doc['chunk_count']} chunks){status}"):
+            st.write(f"🔹 **Tipo:** {doc['file_type']} · **Tamanho:** {doc['size_bytes'] / 1024:.0f} KB · **Enviado em:** {doc['created_at']:%d/%m/%Y %H:%M}")
             st.write(f"🔹 **Preview:** {texto_preview}")
-            
-            if st.button(f"❌ Excluir {fonte}", key=fonte):
+
+            if enviando:
+                st.info("⏳ Este documento ainda está sendo enviado e poderá ser excluído quando o envio terminar.")
+            if st.button(f"❌ Excluir {doc['name']}", key=doc["id"], disabled=enviando):
                 with st.spinner("Removendo documento..."):
                     try:
-                        ids_para_excluir = [doc["id"] for doc in docs]
-                        
-                        # Excluir em lotes de 900
-                        for i in range(0, len(ids_para_excluir), 900):
-                            index.delete(namespace=user_uid, ids=ids_para_excluir[i:i+900])
-                            
+                        # Vetores em lotes paralelos, depois os textos e, por último, o manifesto
+                        delete_document(vector_store, chunk_store, user_uid, doc)
+
                         st.success("✅ Documento removido com sucesso!")
                         st.rerun()
                     except Exception as e:
@@ -0,0 +1,262 @@
+"""
+Índice quantizado para o LocalVectorStore, com reordenação exata.
+
+Cada vetor (opcionalmente após reduzir a dimensão com PCA) é guardado como
+int8 com uma escala float32 (1 byte por dimensão) ou como código binário com
+o sinal de cada dimensão centrada (1 bit por dimensão, comparado por
+distância de Hamming). A primeira passada da busca percorre só esses códigos;
+os melhores `top_k * rerank_factor` candidatos são pontuados de novo contra a
+matriz float32 mapeada em memória, então apenas essas linhas são lidas do
+disco e os scores retornados são exatos.
+
+Benchmark de recall x latência contra a busca exata:
+    python -m chat.quantized_index --rows 200000 --dim 1024 --kinds binary int8
+    python -m chat.quantized_index --vectors embeddings.npy      # embeddings reais (matriz N x D)
+    python -m chat.quantized_index --namespace local_vectors/<uid>
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Namespaces com menos vetores que isso usam só a busca exata
+QUANTIZE_MIN_ROWS = 20000
+
+# Candidatos da primeira passada por resultado final
+RERANK_FACTOR = 20
+
+# Linhas convertidas para float32 por vez na primeira passada (~32 MB com 1024 dimensões)
+CODE_BLOCK_ROWS = 8192
+
+# Linhas usadas para ajustar o PCA e a média dos códigos binários
+SAMPLE_ROWS = 20000
+
+# Contagem de bits por byte, para numpy sem np.bitwise_count
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize(block: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Quantiza cada linha para int8 com escala própria: linha ≈ códigos * escala."""
+    scales = np.abs(block).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.clip(np.rint(block / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def binarize(block: np.ndarray) -> np.ndarray:
+    """Código binário com o sinal de cada dimensão (já centrada), 8 dimensões por byte."""
+    return np.packbits(block > 0, axis=-1)
+
+
+def hamming(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Distância de Hamming entre cada linha de `codes` e `query_code`."""
+    diff = codes ^ query_code
+    if hasattr(np, "bitwise_count") and diff.shape[1] % 8 == 0:
+        return np.bitwise_count(diff.view(np.uint64)).sum(axis=1, dtype=np.int32)
+    return POPCOUNT[diff].sum(axis=1, dtype=np.int32)
+
+
+def top_rows(scores: np.ndarray, rows: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """As `k` linhas de maior score, em ordem decrescente."""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k)[:k]
+        scores, rows = scores[keep], rows[keep]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+class QuantizedIndex:
+    """
+    Códigos quantizados das primeiras `rows` linhas de uma matriz de vetores normalizados.
+
+    Arquivos no diretório: `codes.bin` (linhas x bytes por código), `meta.json`,
+    `scales.f32` (só int8) e `projection.npz` (média e, com PCA, componentes).
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.rows, self.dim, self.kind = meta["rows"], meta["dim"], meta["kind"]
+        dtype = np.int8 if self.kind == "int8" else np.uint8
+        self.codes = np.memmap(self.directory / "codes.bin", dtype=dtype, mode="r", shape=(self.rows, meta["code_bytes"]))
+        self.scales = np.fromfile(self.directory / "scales.f32", dtype=np.float32) if self.kind == "int8" else None
+        projection = np.load(self.directory / "projection.npz")
+        self.mean = projection["mean"]
+        self.components = projection["components"] if "components" in projection else None
+
+    def project(self, block: np.ndarray) -> np.ndarray:
+        """Centraliza (e reduz com PCA, se configurado) vetores na dimensão original."""
+        block = block - self.mean
+        return block @ self.components.T if self.components is not None else block
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @classmethod
+    def open(cls, directory: Path) -> "QuantizedIndex | None":
+        try:
+            return cls(directory)
+        except (FileNotFoundError, ValueError, KeyError, json.JSONDecodeError):
+            return None
+
+    @classmethod
+    def build(cls, directory: Path, matrix: np.ndarray, kind: str = "binary", pca_dim: int | None = None) -> "QuantizedIndex":
+        """Quantiza `matrix` (linhas normalizadas) em blocos e grava o índice de forma atômica."""
+        if kind not in ("binary", "int8"):
+            raise ValueError(f"Tipo de quantização desconhecido: {kind}")
+        directory = Path(directory)
+        tmp = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        rows, dim = matrix.shape
+        # Média (e PCA) ajustados em uma amostra; a projeção mantém o produto interno aproximado
+        sample = np.asarray(matrix[np.sort(np.random.default_rng(0).choice(rows, min(rows, SAMPLE_ROWS), replace=False))])
+        projection = {"mean": sample.mean(axis=0).astype(np.float32)}
+        if pca_dim and pca_dim < dim:
+            _, _, vt = np.linalg.svd(sample - projection["mean"], full_matrices=False)
+            projection["components"] = vt[:pca_dim].astype(np.float32)
+        np.savez(tmp / "projection.npz", **projection)
+
+        code_dim = len(projection["components"]) if "components" in projection else dim
+        with open(tmp / "codes.bin", "wb") as codes_file, open(tmp / "scales.f32", "wb") as scales_file:
+            for start in range(0, rows, CODE_BLOCK_ROWS):
+                block = np.asarray(matrix[start:start + CODE_BLOCK_ROWS], dtype=np.float32) - projection["mean"]
+                if "components" in projection:
+                    block = block @ projection["components"].T
+                if kind == "int8":
+                    codes, scales = quantize(block)
+                    scales_file.write(scales.tobytes())
+                else:
+                    codes = binarize(block)
+                codes_file.write(codes.tobytes())
+
+        code_bytes = code_dim if kind == "int8" else (code_dim + 7) // 8
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "dim": dim, "kind": kind, "code_bytes": code_bytes}, f)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+        return cls(directory)
+
+    def candidates(self, query: np.ndarray, n: int, valid: np.ndarray | None = None) -> np.ndarray:
+        """
+        Primeira passada: as `n` linhas com maior score aproximado.
+
+        Args:
+            query: Consulta normalizada (dimensão original)
+            n: Quantidade de candidatos
+            valid: Máscara das linhas válidas (tamanho >= rows); linhas inválidas são ignoradas
+        """
+        if self.kind == "binary":
+            # Os dois lados são centralizados, como na construção dos códigos
+            query_code = binarize(self.project(query))
+        else:
+            # x·q = (x - média)·q + média·q; o segundo termo é igual para todas as linhas
+            query = (self.components @ query if self.components is not None else query).astype(np.float32)
+
+        best_scores, best_rows = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for start in range(0, self.rows, CODE_BLOCK_ROWS):
+            end = min(start + CODE_BLOCK_ROWS, self.rows)
+            if self.kind == "binary":
+                scores = -hamming(self.codes[start:end], query_code).astype(np.float32)
+            else:
+                scores = (self.codes[start:end].astype(np.float32) @ query) * self.scales[start:end]
+            if valid is not None:
+                scores[~valid[start:end]] = -np.inf
+            best_rows, best_scores = top_rows(
+                np.concatenate([best_scores, scores]), np.concatenate([best_rows, np.arange(start, end)]), n
+            )
+        return best_rows[np.isfinite(best_scores)]
+
+
+def rerank(matrix: np.ndarray, query: np.ndarray, rows: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pontua os candidatos contra os vetores float32 (lendo só essas linhas) e retorna os `top_k` melhores."""
+    rows = np.sort(rows)
+    return top_rows(np.asarray(matrix[rows]) @ query, rows, top_k)
+
+
+def exact_search(matrix: np.ndarray, query: np.ndarray, top_k: int, block_rows: int = 65536) -> np.ndarray:
+    best_scores, best_rows = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+    for start in range(0, len(matrix), block_rows):
+        scores = matrix[start:start + block_rows] @ query
+        best_rows, best_scores = top_rows(
+            np.concatenate([best_scores, scores]), np.concatenate([best_rows, np.arange(start, start + len(scores))]), top_k
+        )
+    return best_rows
+
+
+def synthetic_embeddings(rows: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Vetores normalizados agrupados em clusters, parecidos com embeddings de documentos."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    matrix = centers[rng.integers(0, clusters, rows)] + rng.normal(scale=0.6, size=(rows, dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+def benchmark(matrix: np.ndarray, queries: int, top_k: int, kinds: list, pca_dims: list, rerank_factors: list) -> None:
+    rng = np.random.default_rng(1)
+    # Consultas: vetores da coleção com ruído, como perguntas próximas de trechos existentes
+    picks = matrix[rng.choice(len(matrix), queries, replace=False)]
+    query_set = picks + rng.normal(scale=0.02, size=picks.shape).astype(np.float32)
+    query_set /= np.linalg.norm(query_set, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    truth = [set(exact_search(matrix, q, top_k).tolist()) for q in query_set]
+    exact_ms = (time.perf_counter() - start) / queries * 1000
+    print(f"{len(matrix)} vetores x {matrix.shape[1]} dims · float32 {matrix.nbytes / 2**20:.0f} MB")
+    print(f"exata: {exact_ms:.2f} ms/consulta")
+
+    workdir = Path("quantized_index_benchmark")
+    try:
+        for kind in kinds:
+            for pca_dim in pca_dims:
+                index = QuantizedIndex.build(workdir, matrix, kind=kind, pca_dim=pca_dim)
+                for factor in rerank_factors:
+                    start = time.perf_counter()
+                    recall = 0.0
+                    for q, expected in zip(query_set, truth):
+                        rows, _ = rerank(matrix, q, index.candidates(q, top_k * factor), top_k)
+                        recall += len(expected & set(rows.tolist())) / top_k
+                    elapsed = (time.perf_counter() - start) / queries * 1000
+                    print(f"{kind}{f' + PCA {pca_dim}' if pca_dim else ''} ({index.nbytes / 2**20:.1f} MB) · "
+                          f"rerank x{factor}: recall@{top_k} {recall / queries:.3f} · {elapsed:.2f} ms/consulta")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recall x latência do índice int8 contra a busca exata")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--vectors", help="Arquivo .npy com embeddings reais (N x D)")
+    parser.add_argument("--namespace", help="Diretório de um namespace do LocalVectorStore")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--kinds", nargs="*", default=["binary", "int8"], choices=["binary", "int8"])
+    parser.add_argument("--pca", type=int, nargs="*", default=[0, 256])
+    parser.add_argument("--rerank", type=int, nargs="*", default=[2, 5, 10, 20])
+    args = parser.parse_args()
+
+    if args.vectors:
+        matrix = np.load(args.vectors, mmap_mode="r").astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    elif args.namespace:
+        with open(Path(args.namespace) / "log.jsonl", "r", encoding="utf-8") as f:
+            dim = json.loads(f.readline())["dim"]
+        matrix = np.fromfile(Path(args.namespace) / "vectors.f32", dtype=np.float32).reshape(-1, dim)
+    else:
+        matrix = synthetic_embeddings(args.rows, args.dim)
+
+    benchmark(matrix, args.queries, args.top_k, args.kinds, [dim or None for dim in args.pca], args.rerank)
+
+
+if __name__ == "__main__":
+    main()
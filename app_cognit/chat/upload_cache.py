@@ -0,0 +1,56 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+UPLOAD_CACHE_MAX_CHARS = 100_000_000  # ~100 MB de texto
+
+
+def upload_key(content: bytes, file_type: str, chunk_size: int, chunk_overlap: int) -> str:
+    """Chave do upload: hash do conteúdo do arquivo e das configurações do splitter."""
+    digest = hashlib.sha256(content).hexdigest()
+    return f"{digest}:{file_type}:{chunk_size}:{chunk_overlap}"
+
+
+class UploadCache:
+    """
+    Cache em memória dos uploads já processados, compartilhado pelo processo.
+
+    O Streamlit reexecuta a página a cada interação; guardar os chunks de cada
+    upload faz com que a pré-visualização e o envio usem o mesmo processamento.
+    Cada entrada é um dict com os chunks e o que a página precisa para exibir
+    a pré-visualização. Os uploads usados há mais tempo são descartados quando
+    o texto guardado passa de `max_chars`.
+    """
+
+    def __init__(self, max_chars: int = UPLOAD_CACHE_MAX_CHARS):
+        self.max_chars = max_chars
+        # Uploads maiores que isso não têm os chunks guardados (são processados em streaming no envio)
+        self.max_entry_chars = max_chars // 4
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, entry: dict, size: int) -> None:
+        """Guarda `entry`, cujo texto tem `size` caracteres, descartando os mais antigos se preciso."""
+        with self._lock:
+            if key in self._entries:
+                self._total -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = entry
+            self._sizes[key] = size
+            self._total += size
+
+            while self._total > self.max_chars and len(self._entries) > 1:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total -= self._sizes.pop(old_key)
+
+
+upload_cache = UploadCache()
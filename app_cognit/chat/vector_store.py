@@ -0,0 +1,354 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+from chat.quantized_index import QUANTIZE_MIN_ROWS, RERANK_FACTOR, QuantizedIndex, rerank
+from clients import get_pinecone_index
+
+LOCAL_VECTOR_DIR = Path("local_vectors")
+
+# Linhas da matriz processadas por vez na busca, para limitar a memória temporária
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _done(result=None) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class PineconeVectorStore:
+    """Índice no Pinecone (cliente gRPC), com upserts e exclusões assíncronos."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors: list[dict], namespace: str) -> Future:
+        """Envia os vetores ({"id", "values", "metadata"}) e retorna um future com o resultado."""
+        return self.index.upsert(vectors=vectors, namespace=namespace, async_req=True)
+
+    def delete(self, ids: list[str], namespace: str) -> Future:
+        return self.index.delete(ids=ids, namespace=namespace, async_req=True)
+
+    def query(self, vector: list[float], top_k: int, namespace: str) -> list[dict]:
+        """Retorna os `top_k` vetores mais próximos como dicts com "id", "score" e "metadata"."""
+        response = self.index.query(vector=vector, top_k=top_k, include_metadata=True, namespace=namespace)
+        return [{"id": match.id, "score": match.score, "metadata": dict(match.metadata or {})} for match in response.matches]
+
+    def list_ids(self, namespace: str):
+        """Produz os ids do namespace em páginas (listas), sem carregar todos na memória."""
+        yield from self.index.list(namespace=namespace)
+
+    def fetch(self, ids: list[str], namespace: str) -> list[dict]:
+        """Retorna os vetores de `ids` como dicts com "id", "values" e "metadata"."""
+        response = self.index.fetch(ids=ids, namespace=namespace)
+        return [
+            {"id": vector_id, "values": list(vector.values), "metadata": dict(vector.metadata or {})}
+            for vector_id, vector in response.vectors.items()
+        ]
+
+    def namespaces(self) -> list[str]:
+        return list(self.index.describe_index_stats().namespaces)
+
+
+class LocalNamespace:
+    """
+    Vetores de um namespace em disco: uma matriz float32 mapeada em memória e um log.
+
+    `vectors.f32` recebe cada vetor (normalizado) no fim do arquivo; `log.jsonl`
+    registra upserts (linha inicial, ids e metadados) e exclusões, e é
+    reaplicado ao abrir o namespace. Um id regravado aponta para a linha mais
+    recente; linhas substituídas ou excluídas só são descartadas por compact().
+
+    O log é a fonte da verdade: a entrada é serializada antes de gravar os
+    vetores, e linhas de um upsert que falhou antes do log são sobrescritas
+    pelo próximo. Gravações tomam uma trava de arquivo (flock), e cada
+    processo reaplica o que outros acrescentaram ao log antes de gravar ou
+    buscar, então vários processos do Streamlit podem usar o mesmo diretório.
+
+    Com `quantization` ("binary" ou "int8"), namespaces a partir de
+    QUANTIZE_MIN_ROWS vetores usam um QuantizedIndex na primeira passada da
+    busca, com reordenação exata dos candidatos; linhas gravadas depois da
+    construção do índice são pontuadas diretamente até a próxima reconstrução.
+    """
+
+    def __init__(self, directory: Path, quantization: str | None = None, pca_dim: int | None = None):
+        self.directory = Path(directory)
+        self.vectors_path = self.directory / "vectors.f32"
+        self.log_path = self.directory / "log.jsonl"
+        self.lock_path = self.directory / "lock"
+        self.index_path = self.directory / "quantized"
+        self.quantization = quantization
+        self.pca_dim = pca_dim
+        self._index = None
+        self.lock = threading.RLock()
+        self.dim = None
+        self.rows = {}      # id -> linha
+        self.metadata = {}  # id -> metadados
+        self._row_count = 0
+        self._matrix = None
+        self._log_inode = None
+        self._log_offset = 0
+        self._refresh()
+
+    def _apply(self, entry: dict) -> None:
+        if entry["op"] == "upsert":
+            self.dim = entry["dim"]
+            row = entry.get("start", self._row_count)  # entradas antigas não registram a linha inicial
+            for vector_id, metadata in entry["items"]:
+                self.rows[vector_id] = row
+                self.metadata[vector_id] = metadata
+                row += 1
+            self._row_count = max(self._row_count, row)
+        elif entry["op"] == "delete":
+            for vector_id in entry["ids"]:
+                self.rows.pop(vector_id, None)
+                self.metadata.pop(vector_id, None)
+
+    def _refresh(self) -> None:
+        """Reaplica as entradas do log ainda não lidas; relê tudo se o log foi substituído por compact()."""
+        with self.lock:
+            try:
+                stat = os.stat(self.log_path)
+            except FileNotFoundError:
+                stat = None
+            if stat is None or stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+                self.rows, self.metadata, self._row_count = {}, {}, 0
+                self._log_inode, self._log_offset = (stat.st_ino if stat else None), 0
+                self._matrix, self._index = None, None
+            if stat is None or stat.st_size == self._log_offset:
+                return
+            with open(self.log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+            # Só linhas completas: outro processo pode estar no meio de uma gravação
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                self._apply(json.loads(line))
+            self._log_offset += end
+
+    @contextmanager
+    def _locked(self):
+        """Trava exclusiva do namespace entre threads e processos, com o estado já atualizado pelo log."""
+        with self.lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _append_log(self, line: str) -> None:
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(line)
+        self._refresh()
+
+    def matrix(self) -> np.ndarray:
+        """Matriz (linhas x dimensão) mapeada em memória; é reaberta quando cresce."""
+        with self.lock:
+            if self._matrix is None or len(self._matrix) != self._row_count:
+                if not self._row_count:
+                    return np.empty((0, self.dim or 0), dtype=np.float32)
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._row_count, self.dim))
+            return self._matrix
+
+    def upsert(self, vectors: list[dict]) -> None:
+        if not vectors:
+            return
+        values = np.asarray([vector["values"] for vector in vectors], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1, norms)
+
+        with self._locked():
+            if self.dim is not None and values.shape[1] != self.dim:
+                raise ValueError(f"Dimensão {values.shape[1]} diferente da do namespace ({self.dim})")
+            start = self._row_count
+            items = [[vector["id"], vector.get("metadata", {})] for vector in vectors]
+            # Serializa antes de gravar os vetores: metadados inválidos não deixam linhas no arquivo
+            line = json.dumps({"op": "upsert", "dim": values.shape[1], "start": start, "items": items}, ensure_ascii=False) + "\n"
+            with open(self.vectors_path, "ab") as f:
+                # Descarta linhas de um upsert anterior que falhou antes de chegar ao log
+                f.truncate(start * values.shape[1] * values.itemsize)
+                f.write(values.tobytes())
+            self._append_log(line)
+
+    def delete(self, ids: list[str]) -> None:
+        with self._locked():
+            if not self.log_path.exists():
+                return
+            self._append_log(json.dumps({"op": "delete", "ids": list(ids)}, ensure_ascii=False) + "\n")
+
+    def live_rows(self) -> tuple[np.ndarray, list[str]]:
+        """Linhas válidas (não substituídas nem excluídas) e seus ids, na mesma ordem."""
+        with self.lock:
+            self._refresh()
+            ids = list(self.rows)
+            return np.fromiter((self.rows[vector_id] for vector_id in ids), dtype=np.int64, count=len(ids)), ids
+
+    def quantized_index(self) -> QuantizedIndex | None:
+        """Índice quantizado do namespace, (re)construído quando não cobre ~80% das linhas."""
+        if not self.quantization or len(self.rows) < QUANTIZE_MIN_ROWS:
+            return None
+        with self._locked():
+            if self._index is None:
+                self._index = QuantizedIndex.open(self.index_path)
+            stale = self._index is not None and not (0 <= self._row_count - self._index.rows <= self._index.rows // 4)
+            if self._index is None or stale:
+                self._index = QuantizedIndex.build(self.index_path, self.matrix(), kind=self.quantization, pca_dim=self.pca_dim)
+            return self._index
+
+    def query(self, vector: list[float], top_k: int) -> list[dict]:
+        """Busca por similaridade de cosseno: exata em blocos, ou quantizada com reordenação exata."""
+        rows, ids = self.live_rows()
+        if not ids:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        index = self.quantized_index()
+        matrix = self.matrix()
+
+        valid = np.zeros(len(matrix), dtype=bool)
+        valid[rows] = True
+        row_to_id = dict(zip(rows.tolist(), ids))
+
+        if index is not None:
+            # Candidatos do índice + linhas gravadas depois dele, todos pontuados com os vetores float32
+            tail = np.arange(index.rows, len(matrix))
+            candidates = np.concatenate([index.candidates(query, top_k * RERANK_FACTOR, valid), tail[valid[index.rows:]]])
+            best_rows, best_scores = rerank(matrix, query, candidates, top_k)
+            return [
+                {"id": row_to_id[row], "score": float(score), "metadata": self.metadata[row_to_id[row]]}
+                for row, score in zip(best_rows.tolist(), best_scores.tolist())
+            ]
+
+        best_scores, best_rows = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for start in range(0, len(matrix), SEARCH_BLOCK_ROWS):
+            scores = matrix[start:start + SEARCH_BLOCK_ROWS] @ query
+            scores[~valid[start:start + SEARCH_BLOCK_ROWS]] = -np.inf
+            best_scores = np.concatenate([best_scores, scores])
+            best_rows = np.concatenate([best_rows, np.arange(start, start + len(scores))])
+            if len(best_scores) > top_k:
+                keep = np.argpartition(-best_scores, top_k)[:top_k]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return [
+            {"id": row_to_id[row], "score": float(score), "metadata": self.metadata[row_to_id[row]]}
+            for row, score in zip(best_rows[order].tolist(), best_scores[order].tolist())
+            if np.isfinite(score)
+        ]
+
+    def compact(self) -> None:
+        """Reescreve a matriz e o log apenas com as linhas válidas."""
+        with self._locked():
+            rows, ids = self.live_rows()
+            if len(ids) == self._row_count:
+                return
+            live = np.asarray(self.matrix()[rows]) if len(ids) else np.empty((0, self.dim), dtype=np.float32)
+            self._matrix = None
+
+            tmp_vectors = self.vectors_path.with_suffix(".tmp")
+            tmp_log = self.log_path.with_suffix(".tmp")
+            with open(tmp_vectors, "wb") as f:
+                f.write(live.tobytes())
+            with open(tmp_log, "w", encoding="utf-8") as f:
+                if ids:
+                    items = [[vector_id, self.metadata[vector_id]] for vector_id in ids]
+                    f.write(json.dumps({"op": "upsert", "dim": self.dim, "start": 0, "items": items}, ensure_ascii=False) + "\n")
+            os.replace(tmp_vectors, self.vectors_path)
+            os.replace(tmp_log, self.log_path)
+            # As linhas mudam de posição: o índice quantizado é reconstruído na próxima busca
+            shutil.rmtree(self.index_path, ignore_errors=True)
+            self._refresh()
+
+
+class LocalVectorStore:
+    """
+    Índice local, no próprio processo, com um diretório por namespace.
+
+    Faz busca exata (força bruta) sobre matrizes float32 mapeadas em memória:
+    sem ida e volta pela rede para usuários com poucos documentos, e
+    determinístico para testes e benchmarks sem acesso ao Pinecone.
+    Namespaces grandes usam um índice quantizado (chat.quantized_index).
+    """
+
+    def __init__(self, directory: Path = LOCAL_VECTOR_DIR, quantization: str | None = "binary", pca_dim: int | None = None):
+        self.directory = Path(directory)
+        self.quantization = quantization
+        self.pca_dim = pca_dim
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def namespace(self, name: str) -> LocalNamespace:
+        with self._lock:
+            if name not in self._namespaces:
+                self._namespaces[name] = LocalNamespace(self.directory / name, self.quantization, self.pca_dim)
+            return self._namespaces[name]
+
+    def upsert(self, vectors: list[dict], namespace: str) -> Future:
+        self.namespace(namespace).upsert(vectors)
+        return _done()
+
+    def delete(self, ids: list[str], namespace: str) -> Future:
+        self.namespace(namespace).delete(ids)
+        return _done()
+
+    def query(self, vector: list[float], top_k: int, namespace: str) -> list[dict]:
+        return self.namespace(namespace).query(vector, top_k)
+
+    def list_ids(self, namespace: str, page_size: int = 100):
+        _, ids = self.namespace(namespace).live_rows()
+        for start in range(0, len(ids), page_size):
+            yield ids[start:start + page_size]
+
+    def fetch(self, ids: list[str], namespace: str) -> list[dict]:
+        local = self.namespace(namespace)
+        with local.lock:
+            matrix = local.matrix()
+            return [
+                {"id": vector_id, "values": matrix[local.rows[vector_id]].tolist(), "metadata": local.metadata[vector_id]}
+                for vector_id in ids if vector_id in local.rows
+            ]
+
+    def namespaces(self) -> list[str]:
+        if not self.directory.exists():
+            return []
+        return sorted(path.name for path in self.directory.iterdir() if path.is_dir())
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store():
+    """
+    Retorna o índice de vetores configurado nos secrets, criado uma vez por processo.
+
+    `VECTOR_STORE = "local"` usa o LocalVectorStore (em `LOCAL_VECTOR_DIR`, com
+    `LOCAL_VECTOR_QUANTIZATION` = "binary", "int8" ou "none" e, opcionalmente,
+    `LOCAL_VECTOR_PCA_DIM`); o padrão é o Pinecone, com PINECONE_API_KEY e PINECONE_HOST.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            if st.secrets.get("VECTOR_STORE", "pinecone") == "local":
+                quantization = st.secrets.get("LOCAL_VECTOR_QUANTIZATION", "binary")
+                _store = LocalVectorStore(
+                    st.secrets.get("LOCAL_VECTOR_DIR", LOCAL_VECTOR_DIR),
+                    quantization=None if quantization == "none" else quantization,
+                    pca_dim=st.secrets.get("LOCAL_VECTOR_PCA_DIM"),
+                )
+            else:
+                _store = PineconeVectorStore(get_pinecone_index())
+        return _store
@@ -0,0 +1,121 @@
+"""
+Clientes das APIs externas (OpenAI, Groq, Mistral, Pinecone e embeddings),
+criados uma vez por processo e compartilhados por todas as páginas e threads.
+
+O Streamlit reexecuta as páginas a cada interação; com os clientes em nível
+de processo, as conexões HTTP (keep-alive e sessão TLS) e o canal gRPC do
+Pinecone são reaproveitados entre execuções, usuários e jobs.
+
+Configuração opcional nos secrets:
+    HTTP_POOL_SIZE = 20        # conexões mantidas por API
+    HTTP_TIMEOUT = 600         # segundos por requisição, para todas as APIs
+
+Sem HTTP_TIMEOUT, OpenAI e Groq mantêm o timeout padrão do SDK (600 s, para
+resumos longos e uploads grandes) e a Mistral usa DEFAULT_TIMEOUTS.
+"""
+import os
+import threading
+
+import httpx
+import streamlit as st
+
+_clients = {}
+_lock = threading.Lock()
+
+# Timeout por API quando HTTP_TIMEOUT não está nos secrets; None mantém o padrão do SDK
+DEFAULT_TIMEOUTS = {"openai": None, "groq": None, "mistral": 120.0}
+
+
+def _shared(name: str, factory):
+    """Retorna o cliente `name`, criando-o com `factory` na primeira chamada do processo."""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            if name not in _clients:
+                _clients[name] = factory()
+            client = _clients[name]
+    return client
+
+
+def _secret(name: str):
+    return st.secrets.get(name) or os.getenv(name)
+
+
+def pool_size() -> int:
+    return int(st.secrets.get("HTTP_POOL_SIZE", 20))
+
+
+def timeout(api: str) -> float | None:
+    value = st.secrets.get("HTTP_TIMEOUT")
+    return float(value) if value is not None else DEFAULT_TIMEOUTS[api]
+
+
+def http_client(request_timeout: float | None) -> httpx.Client:
+    """
+    Novo cliente httpx com pool de conexões persistentes (um por API, para não disputarem o pool).
+
+    Com `request_timeout` None o cliente fica com o timeout padrão do httpx,
+    que os SDKs da OpenAI e do Groq substituem pelo seu próprio padrão.
+    """
+    size = pool_size()
+    limits = httpx.Limits(max_connections=size, max_keepalive_connections=size)
+    if request_timeout is None:
+        return httpx.Client(limits=limits)
+    return httpx.Client(limits=limits, timeout=httpx.Timeout(request_timeout, connect=10.0))
+
+
+def get_openai():
+    def create():
+        from openai import OpenAI
+
+        return OpenAI(api_key=_secret("OPENAI_API_KEY"), http_client=http_client(timeout("openai")))
+
+    return _shared("openai", create)
+
+
+def get_groq():
+    def create():
+        from groq import Groq
+
+        # Sem retries automáticos: o transcriber controla os limites de requisição
+        return Groq(api_key=_secret("GROQ_API_KEY"), max_retries=0, http_client=http_client(timeout("groq")))
+
+    return _shared("groq", create)
+
+
+def get_mistral():
+    def create():
+        from mistralai import Mistral
+
+        request_timeout = timeout("mistral")
+        return Mistral(api_key=_secret("MISTRAL_API_KEY"), client=http_client(request_timeout), timeout_ms=int(request_timeout * 1000))
+
+    return _shared("mistral", create)
+
+
+def get_embeddings():
+    """Embeddings do mistral-embed com o cache compartilhado (chat.embedding_cache)."""
+    def create():
+        from langchain_mistralai import MistralAIEmbeddings
+
+        from chat.embedding_cache import CachedEmbeddings
+
+        model = MistralAIEmbeddings(
+            model="mistral-embed",
+            mistral_api_key=_secret("MISTRAL_API_KEY"),
+            max_concurrent_requests=pool_size(),
+            timeout=int(timeout("mistral")),
+        )
+        return CachedEmbeddings(model, model_name="mistral-embed")
+
+    return _shared("embeddings", create)
+
+
+def get_pinecone_index():
+    """Índice do Pinecone (gRPC); o canal é aberto uma vez e reaproveitado."""
+    def create():
+        from pinecone.grpc import PineconeGRPC
+
+        return PineconeGRPC(api_key=_secret("PINECONE_API_KEY")).Index(host=_secret("PINECONE_HOST"))
+
+    return _shared("pinecone", create)
@@ -0,0 +1,206 @@
+import re
+
+import numpy as np
+
+
+def tokenize(text: str, match_by_words: bool = True) -> list[str]:
+    """
+    Split a text into the tokens used for alignment.
+
+    Args:
+        text: Text to split
+        match_by_words: Whether to split into words (True) or characters (False)
+
+    Returns:
+        list[str]: Tokens that join back into the original text
+    """
+    if match_by_words:
+        return [word for word in re.split(r'(\s+\w+)', text) if word]
+    return list(text)
+
+
+def diagonal_matches(left_ids: np.ndarray, right_ids: np.ndarray) -> np.ndarray:
+    """
+    Count the matching tokens of every alignment offset at once.
+
+    Offset `i` places the first `i` tokens of the right sequence under the
+    last tokens of the left one (the same `i` used by the sliding window).
+    Instead of re-slicing both sequences per offset, every equal pair
+    (a, b) is enumerated once through a sorted index of the left tokens and
+    added to the bin `b - a + len(left)`, so the cost is
+    O((n + m) log n + matching pairs) rather than O((n + m) * min(n, m)).
+
+    Args:
+        left_ids: Integer token ids of the left sequence
+        right_ids: Integer token ids of the right sequence
+
+    Returns:
+        np.ndarray: matches[i] for i in 0..len(left) + len(right)
+    """
+    left_length, right_length = len(left_ids), len(right_ids)
+    size = left_length + right_length + 1
+    if not left_length or not right_length:
+        return np.zeros(size, dtype=np.int64)
+
+    order = np.argsort(left_ids, kind='stable')
+    sorted_ids = left_ids[order]
+    lo = np.searchsorted(sorted_ids, right_ids, side='left')
+    hi = np.searchsorted(sorted_ids, right_ids, side='right')
+    counts = hi - lo
+
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(size, dtype=np.int64)
+
+    # Expand each right position into all the left positions holding the same token
+    right_pos = np.repeat(np.arange(right_length), counts)
+    group_start = np.repeat(np.cumsum(counts) - counts, counts)
+    left_pos = order[np.repeat(lo, counts) + np.arange(total) - group_start]
+
+    return np.bincount(right_pos - left_pos + left_length, minlength=size)
+
+
+def best_alignment(left_ids: np.ndarray, right_ids: np.ndarray) -> tuple[int, int, int, int]:
+    """
+    Find the best overlap between two token sequences.
+
+    Uses the same score as the original sliding window: matches divided by
+    the offset plus an epsilon that favours longer overlaps, with at least
+    two matches required and the first offset winning ties.
+
+    Args:
+        left_ids: Integer token ids of the left sequence
+        right_ids: Integer token ids of the right sequence
+
+    Returns:
+        tuple: (left_start, left_stop, right_start, right_stop) of the overlap
+    """
+    left_length, right_length = len(left_ids), len(right_ids)
+    matches = diagonal_matches(left_ids, right_ids)[1:]
+    offsets = np.arange(1, left_length + right_length + 1, dtype=np.float64)
+
+    scores = matches / offsets + offsets / 10000.0
+    scores[matches <= 1] = -np.inf
+    if not len(scores) or scores.max() == -np.inf:
+        return (left_length, left_length, 0, 0)
+
+    i = int(np.argmax(scores)) + 1
+    return (
+        max(0, left_length - i),
+        min(left_length, left_length + right_length - i),
+        max(0, i - left_length),
+        min(right_length, i),
+    )
+
+
+def find_longest_common_sequence(sequences: list[str], match_by_words: bool = True) -> str:
+    """
+    Find the optimal alignment between sequences with longest common sequence and sliding window matching.
+
+    Produces exactly the merge of the original pure Python implementation,
+    with the per-offset match counting done by diagonal_matches.
+
+    Args:
+        sequences: List of text sequences to align and merge
+        match_by_words: Whether to match by words (True) or characters (False)
+
+    Returns:
+        str: Merged sequence with optimal alignment
+    """
+    if not sequences:
+        return ""
+
+    token_lists = [tokenize(seq, match_by_words) for seq in sequences]
+
+    # Map every distinct token to an integer id shared by all sequences
+    vocabulary = {}
+    id_lists = [
+        np.fromiter((vocabulary.setdefault(token, len(vocabulary)) for token in tokens), dtype=np.int64, count=len(tokens))
+        for tokens in token_lists
+    ]
+
+    left_tokens, left_ids = token_lists[0], id_lists[0]
+    total_sequence = []
+
+    for right_tokens, right_ids in zip(token_lists[1:], id_lists[1:]):
+        left_start, left_stop, right_start, right_stop = best_alignment(left_ids, right_ids)
+
+        # Take left half from left sequence and right half from right sequence
+        left_mid = (left_stop + left_start) // 2
+        right_mid = (right_stop + right_start) // 2
+
+        total_sequence.extend(left_tokens[:left_mid])
+        left_tokens, left_ids = right_tokens[right_mid:], right_ids[right_mid:]
+
+    total_sequence.extend(left_tokens)
+    return ''.join(total_sequence)
+
+
+def _sliding_window_merge(sequences: list[str], match_by_words: bool = True) -> str:
+    """Original O((n+m)·min(n,m)) implementation, kept as the benchmark baseline."""
+    if not sequences:
+        return ""
+
+    sequences = [tokenize(seq, match_by_words) for seq in sequences]
+    left_sequence = sequences[0]
+    left_length = len(left_sequence)
+    total_sequence = []
+
+    for right_sequence in sequences[1:]:
+        max_matching = 0.0
+        right_length = len(right_sequence)
+        max_indices = (left_length, left_length, 0, 0)
+
+        for i in range(1, left_length + right_length + 1):
+            eps = float(i) / 10000.0
+            left_start = max(0, left_length - i)
+            left_stop = min(left_length, left_length + right_length - i)
+            right_start = max(0, i - left_length)
+            right_stop = min(right_length, i)
+
+            matches = sum(a == b for a, b in zip(left_sequence[left_start:left_stop], right_sequence[right_start:right_stop]))
+            matching = matches / float(i) + eps
+            if matches > 1 and matching > max_matching:
+                max_matching = matching
+                max_indices = (left_start, left_stop, right_start, right_stop)
+
+        left_start, left_stop, right_start, right_stop = max_indices
+        left_mid = (left_stop + left_start) // 2
+        right_mid = (right_stop + right_start) // 2
+        total_sequence.extend(left_sequence[:left_mid])
+        left_sequence = right_sequence[right_mid:]
+        left_length = len(left_sequence)
+
+    total_sequence.extend(left_sequence)
+    return ''.join(total_sequence)
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m conversor_audio.alignment
+    import random
+    import time
+
+    random.seed(0)
+    vocabulary = [f"palavra{n}" for n in range(400)]
+
+    for words, overlap in [(200, 30), (1000, 150), (4000, 600)]:
+        text = [random.choice(vocabulary) for _ in range(2 * words - overlap)]
+        left = ' '.join(text[:words])
+        right = ' '.join(text[words - overlap:])
+
+        # Character matching with the sliding window takes minutes past ~1000 words
+        for match_by_words in ((True, False) if words <= 1000 else (True,)):
+            timings = {}
+            outputs = {}
+            for name, merge in [("sliding window", _sliding_window_merge), ("diagonal", find_longest_common_sequence)]:
+                start = time.perf_counter()
+                outputs[name] = merge([left, right], match_by_words=match_by_words)
+                timings[name] = time.perf_counter() - start
+
+            assert outputs["sliding window"] == outputs["diagonal"], "merge output differs"
+            mode = "words" if match_by_words else "chars"
+            print(
+                f"{words:>5} words, {overlap:>4} overlap ({mode}): "
+                f"sliding window {timings['sliding window']:.3f}s, diagonal {timings['diagonal']:.3f}s "
+                f"({timings['sliding window'] / timings['diagonal']:.0f}x)"
+            )
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from conversor_audio.chunking import iter_pcm_blocks
+
+CACHE_DIR = Path("transcription_cache")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def audio_fingerprint(audio_path: Path) -> str:
+    """
+    Hash the normalised 16kHz mono PCM of an audio file.
+
+    Hashing the decoded samples rather than the upload means the same
+    recording is recognised whatever container or encoder it came in.
+
+    Args:
+        audio_path: Path to the audio file
+
+    Returns:
+        str: Hex SHA-256 of the PCM stream
+    """
+    digest = hashlib.sha256()
+    for block in iter_pcm_blocks(audio_path):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def transcription_key(fingerprint: str, model: str, language: str) -> str:
+    """Build the cache key of a transcription from the audio hash and the API parameters."""
+    return hashlib.sha256(f"{fingerprint}:{model}:{language}".encode()).hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Persistent on-disk cache of merged transcriptions with size-bounded LRU eviction.
+
+    Each entry is one JSON file named after its key. Reads refresh the file's
+    modification time, and writes evict the least recently used entries
+    until the directory fits in `max_bytes`.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        """
+        Return the cached transcription for `key`, or None on a miss.
+
+        Args:
+            key: Key built by transcription_key
+
+        Returns:
+            dict | None: Merged transcription with "text" and "segments"
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        try:
+            os.utime(path)  # Marks the entry as recently used
+        except FileNotFoundError:
+            pass
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        """
+        Store a merged transcription and evict old entries if needed.
+
+        Args:
+            key: Key built by transcription_key
+            result: Merged transcription with "text" and "segments"
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file first so readers never see a partial entry
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.directory, suffix='.tmp', delete=False) as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(f.name, self._path(key))
+
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
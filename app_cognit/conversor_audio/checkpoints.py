@@ -0,0 +1,138 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+JOBS_DIR = Path("transcription_jobs")
+JOB_MAX_AGE = 7 * 24 * 3600
+
+
+def job_id(cache_key: str, **params) -> str:
+    """Build a job id from the transcription cache key and the chunking parameters."""
+    encoded = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(f"{cache_key}:{encoded}".encode()).hexdigest()
+
+
+def _write_json(path: Path, data) -> None:
+    # Atomic write: a crash never leaves a half-written checkpoint behind
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent, suffix='.tmp', delete=False) as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(f.name, path)
+
+
+class TranscriptionJob:
+    """
+    Durable state of one transcription run.
+
+    The job directory holds `meta.json` (chunk plan and whether the user was
+    already charged) and one `chunk_NNNN.json` per finished chunk with its
+    offset and verbose_json result, so a retry only sends what is missing.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._meta_path = directory / "meta.json"
+
+    def _chunk_path(self, index: int) -> Path:
+        return self.directory / f"chunk_{index:04d}.json"
+
+    @property
+    def meta(self) -> dict:
+        try:
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def update_meta(self, **values) -> None:
+        """Merge `values` into the job metadata."""
+        meta = self.meta
+        meta.update(values, updated_at=time.time())
+        _write_json(self._meta_path, meta)
+
+    @property
+    def plan(self) -> list[tuple[int, int]] | None:
+        plan = self.meta.get("plan")
+        return [tuple(window) for window in plan] if plan else None
+
+    @property
+    def paid(self) -> bool:
+        return bool(self.meta.get("paid"))
+
+    @contextmanager
+    def payment_lock(self):
+        """
+        Hold an exclusive lock (flock) on the job while checking and recording payment.
+
+        Concurrent runs of the same job wait here, so only the first one sees
+        `paid` unset and charges; the others find it set once the lock is free.
+        """
+        with open(self.directory / "payment.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save_chunk(self, index: int, offset: int, result) -> None:
+        """
+        Persist the result of one finished chunk.
+
+        Args:
+            index: Chunk index in the plan
+            offset: Chunk start in milliseconds
+            result: Groq verbose_json response (model or dict)
+        """
+        data = result.model_dump() if hasattr(result, 'model_dump') else result
+        _write_json(self._chunk_path(index), {"offset": offset, "result": data})
+
+    def load_chunks(self) -> dict[int, tuple[dict, int]]:
+        """
+        Load every chunk finished by earlier attempts.
+
+        Returns:
+            dict: chunk index -> (verbose_json result, offset)
+        """
+        chunks = {}
+        for path in self.directory.glob("chunk_*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except json.JSONDecodeError:
+                continue
+            chunks[int(path.stem.split("_")[1])] = (data["result"], data["offset"])
+        return chunks
+
+    def delete(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class CheckpointStore:
+    """Local store of resumable transcription jobs, one directory per job."""
+
+    def __init__(self, directory: Path = JOBS_DIR, max_age: int = JOB_MAX_AGE):
+        self.directory = Path(directory)
+        self.max_age = max_age
+
+    def open(self, job_id: str) -> TranscriptionJob:
+        """Open (or create) the job `job_id`."""
+        path = self.directory / job_id
+        path.mkdir(parents=True, exist_ok=True)
+        return TranscriptionJob(path)
+
+    def purge_stale(self) -> None:
+        """Remove jobs abandoned for longer than `max_age` seconds."""
+        if not self.directory.exists():
+            return
+        limit = time.time() - self.max_age
+        for path in self.directory.iterdir():
+            try:
+                if path.is_dir() and path.stat().st_mtime < limit:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
@@ -0,0 +1,123 @@
+import subprocess
+from pathlib import Path
+from typing import Iterator
+
+SAMPLE_RATE = 16000
+
+
+def probe_duration_ms(audio_path: Path) -> int:
+    """
+    Read the duration of an audio file with ffprobe, without decoding it.
+
+    Args:
+        audio_path: Path to the audio file
+
+    Returns:
+        int: Duration in milliseconds
+
+    Raises:
+        RuntimeError: If ffprobe fails or reports no duration
+    """
+    try:
+        completed = subprocess.run([
+            'ffprobe',
+            '-v', 'error',
+            '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1',
+            str(audio_path)
+        ], check=True, capture_output=True, text=True)
+        return int(float(completed.stdout.strip()) * 1000)
+    except (subprocess.CalledProcessError, ValueError) as e:
+        raise RuntimeError(f"Failed to read audio duration: {e}")
+
+
+def iter_pcm_blocks(audio_path: Path, block_bytes: int = 1 << 20) -> Iterator[bytes]:
+    """
+    Stream the audio as 16kHz mono 16-bit PCM from ffmpeg, one block at a time.
+
+    Args:
+        audio_path: Path to the audio file
+        block_bytes: Size of each block (always a whole number of samples, except maybe the last)
+
+    Yields:
+        bytes: Raw little-endian PCM
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the audio
+    """
+    process = subprocess.Popen([
+        'ffmpeg',
+        '-hide_banner',
+        '-loglevel', 'error',
+        '-i', str(audio_path),
+        '-ar', str(SAMPLE_RATE),
+        '-ac', '1',
+        '-f', 's16le',
+        'pipe:1'
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    try:
+        while block := process.stdout.read(block_bytes):
+            yield block[:len(block) // 2 * 2]
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode(errors='ignore')
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg decoding failed: {stderr}")
+
+
+def encode_chunk(audio_path: Path, start_ms: int, end_ms: int) -> bytes:
+    """
+    Cut a window of the audio straight from ffmpeg and encode it to FLAC in memory.
+
+    Only the requested window is decoded (ffmpeg seeks the input), so memory
+    use depends on the chunk length and not on the length of the recording.
+
+    Args:
+        audio_path: Path to the preprocessed 16kHz mono audio
+        start_ms: Start of the window in milliseconds
+        end_ms: End of the window in milliseconds
+
+    Returns:
+        bytes: FLAC-encoded chunk
+
+    Raises:
+        RuntimeError: If the ffmpeg extraction fails
+    """
+    try:
+        completed = subprocess.run([
+            'ffmpeg',
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-ss', f"{start_ms / 1000:.3f}",
+            '-t', f"{(end_ms - start_ms) / 1000:.3f}",
+            '-i', str(audio_path),
+            '-ar', '16000',
+            '-ac', '1',
+            '-c:a', 'flac',
+            '-f', 'flac',
+            'pipe:1'
+        ], check=True, capture_output=True)
+        return completed.stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"FFmpeg chunk extraction failed: {e.stderr.decode(errors='ignore')}")
+
+
+def plan_fixed_chunks(duration_ms: int, chunk_ms: int, overlap_ms: int) -> list[tuple[int, int]]:
+    """
+    Cut the audio at fixed `chunk_ms - overlap_ms` offsets.
+
+    Args:
+        duration_ms: Audio duration in milliseconds
+        chunk_ms: Chunk length in milliseconds
+        overlap_ms: Overlap between chunks in milliseconds
+
+    Returns:
+        list[tuple[int, int]]: (start_ms, end_ms) of each chunk
+    """
+    total_chunks = (duration_ms // (chunk_ms - overlap_ms)) + 1
+    starts = [i * (chunk_ms - overlap_ms) for i in range(total_chunks)]
+    return [(start, min(start + chunk_ms, duration_ms)) for start in starts]
@@ -0,0 +1,121 @@
+import re
+import threading
+import time
+
+
+# Groq envia os tempos de reset no formato "1m30.5s", "7.66s" ou "120ms"
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNIT_SECONDS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+
+def parse_reset_duration(value) -> float | None:
+    """
+    Convert a rate limit reset header into seconds.
+
+    Args:
+        value: Header value such as "2m59.56s", "7.66s", "120ms" or "30"
+
+    Returns:
+        float | None: Seconds until the limit resets, or None if the value can't be parsed
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every worker of a transcription job.
+
+    Workers call acquire() before each request. The bucket refills at `rate`
+    tokens per second up to `capacity`. A 429's retry-after pauses the whole
+    pool together instead of each worker sleeping on its own, and the daily
+    request budget reported by the provider only holds requests back when
+    it is about to run out.
+    """
+
+    def __init__(self, rate: float = 20 / 60, capacity: int = 4):
+        """
+        Args:
+            rate: Tokens added per second (default 20 requests per minute)
+            capacity: Maximum burst of requests allowed at once
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop every worker for `seconds` and drain the bucket (used on HTTP 429)."""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated_at = now
+
+    def update_from_headers(self, headers) -> None:
+        """
+        Adjust the bucket using the provider's rate limit headers.
+
+        Args:
+            headers: Mapping of response headers (retry-after and x-ratelimit-* are read)
+        """
+        if not headers:
+            return
+
+        retry_after = parse_reset_duration(headers.get('retry-after'))
+        if retry_after is not None:
+            self.pause(retry_after)
+            return
+
+        # x-ratelimit-*-requests is Groq's daily request budget: spreading it over the reset
+        # window would throttle every job, so it only matters once it is nearly used up
+        remaining = headers.get('x-ratelimit-remaining-requests')
+        reset = parse_reset_duration(headers.get('x-ratelimit-reset-requests'))
+        if remaining is None or reset is None:
+            return
+
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            return
+
+        if remaining <= 0:
+            self.pause(reset)
+        elif remaining < self.capacity:
+            with self._lock:
+                self._refill(time.monotonic())
+                # Never promise more requests than the provider still accepts today
+                self._tokens = min(self._tokens, float(remaining))
@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import numpy as np
+
+from conversor_audio.chunking import SAMPLE_RATE, iter_pcm_blocks
+
+FRAME_MS = 30
+
+
+def frame_energies(audio_path: Path, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """
+    Compute the mean energy of every frame of the audio, streaming PCM from ffmpeg.
+
+    The audio is read through iter_pcm_blocks, so only one block and the
+    (small) energy array are in memory at any time.
+
+    Args:
+        audio_path: Path to the audio file
+        frame_ms: Frame length in milliseconds
+
+    Returns:
+        np.ndarray: float32 energy per frame
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the audio
+    """
+    frame_samples = SAMPLE_RATE * frame_ms // 1000
+
+    energies = []
+    leftover = np.empty(0, dtype=np.int16)
+    for block in iter_pcm_blocks(audio_path, block_bytes=frame_samples * 2 * 2000):
+        samples = np.concatenate([leftover, np.frombuffer(block, dtype=np.int16)])
+        usable = len(samples) // frame_samples * frame_samples
+        frames = samples[:usable].astype(np.float32).reshape(-1, frame_samples)
+        energies.append(np.mean(frames * frames, axis=1))
+        leftover = samples[usable:]
+
+    if len(leftover):
+        energies.append(np.array([np.mean(leftover.astype(np.float32) ** 2)], dtype=np.float32))
+
+    return np.concatenate(energies).astype(np.float32) if energies else np.empty(0, dtype=np.float32)
+
+
+def plan_silence_chunks(
+    energies: np.ndarray,
+    duration_ms: int,
+    chunk_ms: int,
+    overlap_ms: int,
+    search_ms: int,
+    frame_ms: int = FRAME_MS,
+    smoothing_ms: int = 300,
+) -> list[tuple[int, int]]:
+    """
+    Place every chunk boundary in the quietest pause before the chunk limit.
+
+    For each chunk, the last `search_ms` before its maximum length are
+    scanned for the lowest smoothed energy (a pause rather than a single
+    quiet frame), preferring the pause closest to the limit. The next chunk
+    starts at that cut, and the current one runs `overlap_ms` past it.
+
+    Args:
+        energies: Energy per frame, as returned by frame_energies
+        duration_ms: Audio duration in milliseconds
+        chunk_ms: Maximum chunk length in milliseconds
+        overlap_ms: Audio shared by consecutive chunks in milliseconds
+        search_ms: How far before the chunk limit a pause is looked for
+        frame_ms: Frame length used to compute the energies
+        smoothing_ms: Window of the moving average applied to the energies
+
+    Returns:
+        list[tuple[int, int]]: (start_ms, end_ms) of each chunk
+    """
+    window = max(1, smoothing_ms // frame_ms)
+    smoothed = np.convolve(energies, np.ones(window, dtype=np.float32) / window, mode='same') if len(energies) else energies
+
+    plan = []
+    start = 0
+    while duration_ms - start > chunk_ms:
+        latest = start + chunk_ms - overlap_ms
+        earliest = max(start + overlap_ms + frame_ms, latest - search_ms)
+        lo, hi = earliest // frame_ms, min(latest // frame_ms, len(smoothed))
+
+        if hi > lo:
+            # Último mínimo da janela: a pausa mais próxima do limite do chunk
+            quietest = hi - 1 - int(np.argmin(smoothed[lo:hi][::-1]))
+            cut = quietest * frame_ms + frame_ms // 2
+        else:
+            cut = latest
+
+        plan.append((start, min(cut + overlap_ms, duration_ms)))
+        start = cut
+
+    plan.append((start, duration_ms))
+    return plan
@@ -0,0 +1,437 @@
+import time
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+import streamlit as st
+from groq import Groq, RateLimitError
+
+from clients import get_groq
+
+from conversor_audio.alignment import find_longest_common_sequence
+from conversor_audio.cache import TranscriptionCache, audio_fingerprint, transcription_key
+from conversor_audio.checkpoints import CheckpointStore, job_id
+from conversor_audio.chunking import encode_chunk, plan_fixed_chunks, probe_duration_ms
+from conversor_audio.rate_limit import TokenBucket, parse_reset_duration
+from conversor_audio.silence import frame_energies, plan_silence_chunks
+
+# Transcription parameters (also part of the cache key)
+GROQ_MODEL = "whisper-large-v3"
+GROQ_LANGUAGE = "pt" # We highly recommend specifying the language of your audio if you know it
+
+transcription_cache = TranscriptionCache()
+checkpoint_store = CheckpointStore()
+
+
+def preprocess_audio(input_path: Path) -> Path:
+    """
+    Preprocess audio file to 16kHz mono FLAC using ffmpeg.
+    FLAC provides lossless compression for faster upload times.
+    """
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    
+    with tempfile.NamedTemporaryFile(suffix='.flac', delete=False) as temp_file:
+        output_path = Path(temp_file.name)
+        
+    print("Converting audio to 16kHz mono FLAC...")
+    try:
+        subprocess.run([
+            'ffmpeg',
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-i', input_path,
+            '-ar', '16000',
+            '-ac', '1',
+            '-c:a', 'flac',
+            '-y',
+            output_path
+        ], check=True) 
+        return output_path
+    # We'll raise an error if our FFmpeg conversion fails
+    except subprocess.CalledProcessError as e:
+        output_path.unlink(missing_ok=True)
+        raise RuntimeError(f"FFmpeg conversion failed: {e.stderr}")
+    
+def transcribe_single_chunk(client: Groq, chunk: bytes, chunk_num: int, total_chunks: int, limiter: TokenBucket | None = None) -> tuple[dict, float]:
+    """
+    Transcribe a single audio chunk with Groq API.
+    
+    Args:
+        client: Groq client instance
+        chunk: FLAC-encoded audio chunk, reused as is on every retry
+        chunk_num: Current chunk number
+        total_chunks: Total number of chunks
+        limiter: Rate limiter shared by every worker of the job
+        
+    Returns:
+        Tuple of (transcription result, processing time)
+
+    Raises:
+        Exception: If chunk transcription fails after retries
+    """
+    total_api_time = 0
+    if limiter is None:
+        limiter = TokenBucket()
+    
+    while True:
+        limiter.acquire()
+        start_time = time.time()
+        try:
+            response = client.audio.transcriptions.with_raw_response.create(
+                file=("chunk.flac", chunk, "audio/flac"),
+                model=GROQ_MODEL,
+                language=GROQ_LANGUAGE,
+                response_format="verbose_json"
+            )
+            limiter.update_from_headers(response.headers)
+            result = response.parse()
+            api_time = time.time() - start_time
+            total_api_time += api_time
+            
+            print(f"Chunk {chunk_num}/{total_chunks} processed in {api_time:.2f}s")
+            return result, total_api_time
+            
+        except RateLimitError as e:
+            wait = parse_reset_duration(e.response.headers.get('retry-after')) or 60  # default wait time
+            print(f"\nRate limit hit for chunk {chunk_num} - retrying in {wait:.1f} seconds...")
+            limiter.pause(wait)
+            continue
+            
+        except Exception as e:
+            print(f"Error transcribing chunk {chunk_num}: {str(e)}")
+            raise
+
+class TranscriptMerger:
+    """
+    Merge transcription chunks incrementally, in chunk order.
+
+    Each call to add() returns the segments that can no longer change: the
+    chunk's own segments except the last one, which waits for the next
+    chunk to be merged across the boundary. The output is the same as
+    merging all chunks at once with merge_transcripts.
+    """
+
+    def __init__(self, starts: list[int]):
+        """
+        Args:
+            starts: Start time (ms) of every chunk, in order
+        """
+        self.starts = starts
+        self.segments = []
+        self._index = 0
+        self._pending = None
+
+    def _split_overlap(self, segments: list[dict], index: int) -> list[dict]:
+        # For last chunk, keep all segments
+        if index == len(self.starts) - 1:
+            return segments
+
+        # Split segments into current and overlap based on next chunk's start time
+        next_start = self.starts[index + 1]
+        current_segments = []
+        overlap_segments = []
+
+        for segment in segments:
+            if segment['end'] * 1000 > next_start:
+                overlap_segments.append(segment)
+            else:
+                current_segments.append(segment)
+
+        # Merge overlap segments if any exist
+        if overlap_segments:
+            merged_overlap = overlap_segments[0].copy()
+            merged_overlap.update({
+                'text': ' '.join(s['text'] for s in overlap_segments),
+                'end': overlap_segments[-1]['end']
+            })
+            current_segments.append(merged_overlap)
+
+        return current_segments
+
+    def add(self, chunk) -> list[dict]:
+        """
+        Add the next chunk result and return the segments it settles.
+
+        Args:
+            chunk: verbose_json result of the next chunk (model or dict)
+
+        Returns:
+            list[dict]: Newly finalised segments
+        """
+        index = self._index
+        self._index += 1
+
+        # Extract full segment data including metadata
+        data = chunk.model_dump() if hasattr(chunk, 'model_dump') else chunk
+        processed = self._split_overlap(data['segments'], index)
+
+        settled = []
+        if self._pending is not None:
+            # Merge boundary segments
+            first_segment = processed[0]
+            merged_segment = self._pending.copy()
+            merged_segment.update({
+                'text': find_longest_common_sequence([self._pending['text'], first_segment['text']]),
+                'end': first_segment['end']
+            })
+            settled.append(merged_segment)
+
+        if index == len(self.starts) - 1:
+            settled.extend(processed)
+            self._pending = None
+        else:
+            settled.extend(processed[:-1])
+            self._pending = processed[-1]
+
+        self.segments.extend(settled)
+        return settled
+
+    def result(self) -> dict:
+        """Return the merged transcription of every chunk added so far."""
+        return {
+            "text": ' '.join(segment['text'] for segment in self.segments),
+            "segments": self.segments
+        }
+
+
+def merge_transcripts(results: list[tuple[dict, int]]) -> dict:
+    """
+    Merge transcription chunks and handle overlaps by:
+    1. Merge all segments within each chunk's overlap/stride
+    2. Merge chunk boundaries using find_longest_common_sequence
+    
+    Args:
+        results: List of (result, start_time) tuples
+        
+    Returns:
+        dict: Merged transcription
+    """
+    print("\nMerging results...")
+    merger = TranscriptMerger([start for _, start in results])
+    for chunk, _ in results:
+        merger.add(chunk)
+    return merger.result()
+
+def save_results(result: dict, audio_path: Path) -> Path:
+    """
+    Save transcription results to files.
+    
+    Args:
+        result: Transcription result dictionary
+        audio_path: Original audio file path
+        
+    Returns:
+        base_path: Base path where files were saved
+
+    Raises:
+        IOError: If saving results fails
+    """
+    try:
+        output_dir = Path("transcriptions")
+        output_dir.mkdir(exist_ok=True)
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_path = output_dir / f"{Path(audio_path).stem}_{timestamp}"
+        
+        # Save results in different formats
+        with open(f"{base_path}.txt", 'w', encoding='utf-8') as f:
+            f.write(result["text"])
+        
+        #with open(f"{base_path}_full.json", 'w', encoding='utf-8') as f:
+         #   json.dump(result, f, indent=2, ensure_ascii=False)
+        
+       # with open(f"{base_path}_segments.json", 'w', encoding='utf-8') as f:
+        #    json.dump(result["segments"], f, indent=2, ensure_ascii=False)
+        
+        print(f"\nResults saved to transcriptions folder:")
+        print(f"- {base_path}.txt")
+        #print(f"- {base_path}_full.json")
+        #print(f"- {base_path}_segments.json")
+        
+        return base_path
+    
+    except IOError as e:
+        print(f"Error saving results: {str(e)}")
+        raise
+
+def iter_transcription(audio_path: Path, chunk_length: int = 600, overlap: int = 1, max_workers: int = 4, silence_search: int = 30, on_cache_miss: Callable[[], bool] | None = None, payer: str | None = None) -> Iterator[dict]:
+    """
+    Transcribe audio in chunks with Whisper via Groq API, yielding progress as chunks finish.
+
+    Chunks are sent concurrently by up to `max_workers` threads that share a
+    single token bucket, so a 429 pauses the whole pool once instead of
+    stalling every chunk in turn. Each chunk is cut straight from the
+    preprocessed file by ffmpeg, so the recording is never decoded whole.
+
+    Boundaries are placed in the quietest pause found in the last
+    `silence_search` seconds of each chunk, so words are not split and the
+    overlap only needs to cover the edges of the cut.
+
+    Results are cached by a hash of the normalised audio plus model and
+    language; a cache hit returns without calling the API or `on_cache_miss`.
+
+    Every finished chunk is checkpointed to a local job store. If the run
+    fails, calling it again with the same audio, settings and payer only
+    sends the missing chunks and does not call `on_cache_miss` a second time.
+    Checkpoints are kept per payer, so one user never resumes (and skips
+    paying for) a job another user paid for.
+
+    Args:
+        audio_path: Path to audio file
+        chunk_length: Length of each chunk in seconds
+        overlap: Overlap between chunks in seconds
+        max_workers: Maximum number of chunks transcribed at the same time
+        silence_search: Seconds searched for a pause before each cut (0 cuts at fixed offsets)
+        on_cache_miss: Called once per job before any API request (e.g. to debit coins); returning False aborts
+        payer: Who `on_cache_miss` charges (e.g. the user's e-mail), part of the checkpoint key
+
+    Yields:
+        dict: Events with an "event" key:
+            "planned": total_chunks, completed (chunks restored from a checkpoint)
+            "chunk": done, total_chunks, segments (newly finalised, in order), eta (seconds or None)
+            "result": result (merged transcription), cached (bool)
+            "aborted": on_cache_miss returned False
+
+    Raises:
+        ValueError: If Groq API key is not set
+        RuntimeError: If audio file fails to load
+    """
+    api_key = st.secrets["GROQ_API_KEY"]
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable not set")
+    
+    print(f"\nStarting transcription of: {audio_path}")
+    # Make sure your Groq API key is configured. If you don't have one, you can get one at https://console.groq.com/keys!
+    # The client is shared by the process, so jobs reuse its pooled connections
+    client = get_groq()
+    
+    processed_path = None
+    try:
+        # Preprocess audio and get basic info
+        processed_path = preprocess_audio(audio_path)
+
+        cache_key = transcription_key(audio_fingerprint(processed_path), GROQ_MODEL, GROQ_LANGUAGE)
+        cached = transcription_cache.get(cache_key)
+        if cached is not None:
+            print("Transcription found in cache")
+            yield {"event": "result", "result": cached, "cached": True}
+            return
+
+        # Resume a previous attempt at the same audio and settings, if any
+        checkpoint_store.purge_stale()
+        job = checkpoint_store.open(job_id(cache_key, payer=payer, chunk_length=chunk_length, overlap=overlap, silence_search=silence_search))
+
+        # Charge and record it under the job lock, so concurrent runs of one job charge only once
+        with job.payment_lock():
+            aborted = False
+            if not job.paid:
+                aborted = on_cache_miss is not None and not on_cache_miss()
+                if not aborted:
+                    job.update_meta(paid=True)
+        if aborted:
+            # The job directory is left for purge_stale: another run may be waiting on its lock
+            yield {"event": "aborted"}
+            return
+
+        plan = job.plan
+        if plan is None:
+            duration = probe_duration_ms(processed_path)
+            print(f"Audio duration: {duration/1000:.2f}s")
+            
+            # Plan chunk boundaries
+            chunk_ms = chunk_length * 1000
+            overlap_ms = overlap * 1000
+            if silence_search:
+                energies = frame_energies(processed_path)
+                plan = plan_silence_chunks(energies, duration, chunk_ms, overlap_ms, silence_search * 1000)
+            else:
+                plan = plan_fixed_chunks(duration, chunk_ms, overlap_ms)
+            job.update_meta(plan=plan)
+
+        total_chunks = len(plan)
+        completed = job.load_chunks()
+        missing = [i for i in range(total_chunks) if i not in completed]
+        print(f"Processing {len(missing)} of {total_chunks} chunks...")
+        yield {"event": "planned", "total_chunks": total_chunks, "completed": total_chunks - len(missing)}
+        
+        limiter = TokenBucket(capacity=max_workers)
+        merger = TranscriptMerger([start for start, _ in plan])
+        next_index = 0
+        total_transcription_time = 0
+        started_at = time.time()
+
+        def process_chunk(i: int) -> float:
+            start, end = plan[i]
+            print(f"\nProcessing chunk {i+1}/{total_chunks}")
+            print(f"Time range: {start/1000:.1f}s - {end/1000:.1f}s")
+            # Each worker encodes only its own window, so at most `max_workers` chunks are in memory
+            chunk = encode_chunk(processed_path, start, end)
+            result, chunk_time = transcribe_single_chunk(client, chunk, i+1, total_chunks, limiter)
+            # Checkpoint as soon as the chunk finishes so a later failure doesn't lose it
+            job.save_chunk(i, start, result)
+            completed[i] = (result, start)
+            return chunk_time
+
+        def settle() -> list[dict]:
+            # Chunks may finish out of order; only the contiguous prefix can be merged
+            nonlocal next_index
+            segments = []
+            while next_index in completed:
+                segments.extend(merger.add(completed[next_index][0]))
+                next_index += 1
+            return segments
+
+        # Chunks restored from a checkpoint are shown right away
+        segments = settle()
+        if segments:
+            yield {"event": "chunk", "done": next_index, "total_chunks": total_chunks, "segments": segments, "eta": None}
+
+        # Send missing chunks in parallel and stream what each one settles
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(process_chunk, i) for i in missing]
+            for finished, future in enumerate(as_completed(futures), start=1):
+                total_transcription_time += future.result()
+
+                elapsed = time.time() - started_at
+                eta = elapsed / finished * (len(missing) - finished)
+                yield {
+                    "event": "chunk",
+                    "done": total_chunks - len(missing) + finished,
+                    "total_chunks": total_chunks,
+                    "segments": settle(),
+                    "eta": eta,
+                }
+
+        print("\nMerging results...")
+        final_result = merger.result()
+        save_results(final_result, audio_path)
+        transcription_cache.put(cache_key, final_result)
+        job.delete()
+            
+        print(f"\nTotal Groq API transcription time: {total_transcription_time:.2f}s")
+        
+        yield {"event": "result", "result": final_result, "cached": False}
+    
+    # Clean up temp files regardless of successful creation    
+    finally:
+        if processed_path:
+            Path(processed_path).unlink(missing_ok=True)
+
+
+def transcribe_audio_in_chunks(audio_path: Path, chunk_length: int = 600, overlap: int = 1, max_workers: int = 4, silence_search: int = 30, on_cache_miss: Callable[[], bool] | None = None, payer: str | None = None) -> dict | None:
+    """
+    Transcribe audio in chunks with Whisper via Groq API and return the merged result.
+
+    Blocking wrapper around iter_transcription; see it for the arguments.
+
+    Returns:
+        dict | None: Containing transcription results, or None if on_cache_miss aborted
+    """
+    for event in iter_transcription(audio_path, chunk_length, overlap, max_workers, silence_search, on_cache_miss, payer):
+        if event["event"] == "result":
+            return event["result"]
+    return None
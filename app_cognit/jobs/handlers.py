@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import psycopg2
+from clients import get_openai
+from jobs.job_queue import DB_CONFIG
+
+
+def debit_coins(email, amount):
+    """Debita moedas do usuário com um único UPDATE atômico (sem depender da interface do Streamlit)."""
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET coins = coins - %s WHERE email = %s AND coins >= %s RETURNING coins",
+                (amount, email, amount),
+            )
+            return cursor.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def run_transcription(payload: dict, report) -> dict:
+    """Transcreve um áudio com o Groq; as moedas só são debitadas se o áudio não estiver no cache."""
+    from conversor_audio.transcriber import iter_transcription
+
+    audio_path = Path(payload["audio_path"])
+    debited = False
+
+    def charge():
+        nonlocal debited
+        debited = debit_coins(payload["email"], payload["cost"])
+        return debited
+
+    partial_text = []
+    result = None
+    for event in iter_transcription(audio_path, on_cache_miss=charge, payer=payload["email"]):
+        if event["event"] == "planned":
+            report({"done": event["completed"], "total_chunks": event["total_chunks"], "eta": None, "text": ""})
+        elif event["event"] == "chunk":
+            partial_text.extend(segment["text"] for segment in event["segments"])
+            report({"done": event["done"], "total_chunks": event["total_chunks"], "eta": event["eta"], "text": " ".join(partial_text)})
+        elif event["event"] == "result":
+            result = event["result"]
+        elif event["event"] == "aborted":
+            audio_path.unlink(missing_ok=True)
+            return {"aborted": True}
+
+    # Em caso de erro o arquivo é mantido para que o job possa ser retomado (até JOB_FILE_MAX_AGE; ver purge_stale_job_files)
+    audio_path.unlink(missing_ok=True)
+    return {"text": result["text"], "segments": result["segments"], "debited": debited}
+
+
+def run_summary(payload: dict, report) -> dict:
+    """Gera a transcrição estruturada por falante e o resumo de uma gravação."""
+    from text_extractor.model_client import get_models
+    from text_extractor.summary_pipeline import summarize_recording
+
+    audio_path = Path(payload["audio_path"])
+    stages = []
+
+    def on_stage_done(name, seconds):
+        stages.append([name, seconds])
+        report({"stages": stages})
+
+    summary = summarize_recording(str(audio_path), get_models(), get_openai(), on_stage_done=on_stage_done)
+    audio_path.unlink(missing_ok=True)
+    return summary
+
+
+def run_pdf_agent(payload: dict, report) -> dict:
+    """Responde ao pedido do usuário sobre o texto extraído de um PDF."""
+    from text_extractor.summarizer import MapReduceSummarizer
+
+    summarizer = MapReduceSummarizer(get_openai(), model="gpt-4", temperature=0.7)
+    response = summarizer.summarize(
+        payload["text"],
+        f"Você é um assistente especializado em processamento de PDFs.\nPedido do usuário: {payload['prompt']}"
+    )
+    return {"response": response}
+
+
+HANDLERS = {
+    "transcription": run_transcription,
+    "summary": run_summary,
+    "pdf_agent": run_pdf_agent,
+}
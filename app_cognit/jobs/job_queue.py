@@ -0,0 +1,192 @@
+import json
+import time
+import uuid
+from pathlib import Path
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import Json, RealDictCursor
+
+# 🔹 Configuração do Banco de Dados PostgreSQL
+DB_CONFIG = st.secrets["postgresql"]
+
+# Arquivos enviados pelas páginas para os workers (precisam estar acessíveis pelos dois)
+JOB_FILES_DIR = Path("job_files")
+
+# Arquivos mantidos para jobs que falharam (e podem ser repetidos) são apagados depois desse tempo, em segundos
+JOB_FILE_MAX_AGE = 7 * 24 * 3600
+
+# Jobs "running" sem heartbeat há mais que isso voltam para a fila (worker caiu)
+STALE_AFTER = "5 minutes"
+
+# Execuções por job antes de desistir de retomá-lo (um job que derruba o worker não volta para sempre)
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress JSONB,
+    result JSONB,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS jobs_queue_idx ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_owner_idx ON jobs (owner, kind, created_at DESC);
+"""
+
+# Colunas lidas pelas páginas a cada atualização; o payload (que pode ter o texto de um documento inteiro) fica de fora
+STATUS_COLUMNS = "id, status, progress, result, error"
+
+
+class JobQueue:
+    """
+    Fila de jobs em segundo plano, persistida no PostgreSQL.
+
+    As páginas enviam jobs com submit() e acompanham status, progresso e
+    resultado com get()/latest(). Os workers (jobs.worker) retiram jobs com
+    claim(), que usa FOR UPDATE SKIP LOCKED para que cada job seja executado
+    por um único worker, mesmo com vários processos ou máquinas. heartbeat(),
+    complete() e fail() recebem o `attempts` retornado por claim() e só valem
+    para essa execução, então um worker cujo job foi retomado por outro não
+    sobrescreve o resultado da nova execução.
+    """
+
+    def __init__(self, db_config=DB_CONFIG):
+        self.db_config = db_config
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db_config)
+        if not self._schema_ready:
+            with conn, conn.cursor() as cursor:
+                cursor.execute(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _execute(self, query: str, params=(), fetch: str | None = None):
+        conn = self._connect()
+        try:
+            with conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                if fetch == "one":
+                    return cursor.fetchone()
+                if fetch == "all":
+                    return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def submit(self, kind: str, owner: str, payload: dict) -> str:
+        """Enfileira um job e retorna seu id."""
+        job_id = str(uuid.uuid4())
+        self._execute(
+            "INSERT INTO jobs (id, kind, owner, payload) VALUES (%s, %s, %s, %s)",
+            (job_id, kind, owner, Json(payload)),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        """Retorna o job `job_id` (status, progresso, resultado e erro)."""
+        return self._execute(f"SELECT {STATUS_COLUMNS} FROM jobs WHERE id = %s", (job_id,), fetch="one")
+
+    def latest(self, owner: str, kind: str, limit: int = 5) -> list[dict]:
+        """Retorna os jobs mais recentes do usuário, para retomar o acompanhamento após recarregar a página."""
+        return self._execute(
+            f"SELECT {STATUS_COLUMNS} FROM jobs WHERE owner = %s AND kind = %s ORDER BY created_at DESC LIMIT %s",
+            (owner, kind, limit), fetch="all",
+        )
+
+    def claim(self, kinds: list[str]) -> dict | None:
+        """
+        Retira o próximo job da fila (ou um job abandonado por um worker que caiu).
+
+        Jobs abandonados já executados MAX_ATTEMPTS vezes não são retomados:
+        ficam como "failed", já que provavelmente derrubam o worker.
+        """
+        self._execute(f"""
+            UPDATE jobs SET status = 'failed', finished_at = now(),
+                            error = 'O processamento foi interrompido ' || attempts || ' vezes (o worker parou de responder).'
+            WHERE kind = ANY(%s) AND status = 'running' AND attempts >= %s
+              AND heartbeat_at < now() - interval '{STALE_AFTER}'
+        """, (kinds, MAX_ATTEMPTS))
+        return self._execute(f"""
+            UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                            started_at = now(), heartbeat_at = now()
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE kind = ANY(%s)
+                  AND (status = 'queued'
+                       OR (status = 'running' AND heartbeat_at < now() - interval '{STALE_AFTER}' AND attempts < %s))
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING *
+        """, (kinds, MAX_ATTEMPTS), fetch="one")
+
+    def heartbeat(self, job_id: str, attempt: int, progress: dict | None = None) -> None:
+        """Sinaliza que o job segue em execução e, opcionalmente, atualiza o progresso."""
+        if progress is None:
+            self._execute(
+                "UPDATE jobs SET heartbeat_at = now() WHERE id = %s AND attempts = %s AND status = 'running'",
+                (job_id, attempt),
+            )
+        else:
+            self._execute(
+                "UPDATE jobs SET heartbeat_at = now(), progress = %s WHERE id = %s AND attempts = %s AND status = 'running'",
+                (Json(progress), job_id, attempt),
+            )
+
+    def complete(self, job_id: str, attempt: int, result: dict) -> None:
+        self._execute(
+            """
+            UPDATE jobs SET status = 'done', result = %s, error = NULL, finished_at = now()
+            WHERE id = %s AND attempts = %s AND status = 'running'
+            """,
+            (Json(json.loads(json.dumps(result, default=float))), job_id, attempt),
+        )
+
+    def fail(self, job_id: str, attempt: int, error: str) -> None:
+        self._execute(
+            """
+            UPDATE jobs SET status = 'failed', error = %s, finished_at = now()
+            WHERE id = %s AND attempts = %s AND status = 'running'
+            """,
+            (error, job_id, attempt),
+        )
+
+    def retry(self, job_id: str) -> None:
+        """Devolve um job que falhou para a fila."""
+        self._execute(
+            "UPDATE jobs SET status = 'queued', error = NULL, finished_at = NULL WHERE id = %s AND status = 'failed'",
+            (job_id,),
+        )
+
+
+def save_job_file(uploaded_file) -> str:
+    """Salva o arquivo enviado em JOB_FILES_DIR e retorna o caminho a ser passado no payload."""
+    JOB_FILES_DIR.mkdir(parents=True, exist_ok=True)
+    path = JOB_FILES_DIR / f"{uuid.uuid4()}_{Path(uploaded_file.name).name}"
+    with open(path, "wb") as f:
+        f.write(uploaded_file.getbuffer())
+    return str(path.resolve())
+
+
+def purge_stale_job_files(max_age: int = JOB_FILE_MAX_AGE) -> None:
+    """Remove de JOB_FILES_DIR os arquivos de jobs abandonados (ex.: falharam e não foram repetidos)."""
+    if not JOB_FILES_DIR.exists():
+        return
+    limit = time.time() - max_age
+    for path in JOB_FILES_DIR.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < limit:
+                path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            continue
@@ -0,0 +1,48 @@
+import time
+
+import streamlit as st
+
+from jobs.job_queue import JobQueue
+
+POLL_SECONDS = 2
+
+job_queue = JobQueue()
+
+
+def current_job(kind: str, owner: str) -> dict | None:
+    """
+    Retorna o job acompanhado pela página.
+
+    Usa o id guardado na sessão e, se a página foi recarregada (sessão nova),
+    o job mais recente do usuário, para não perder nem refazer o trabalho.
+    """
+    key = f"job_{kind}"
+    job_id = st.session_state.get(key)
+    if job_id:
+        return job_queue.get(job_id)
+
+    jobs = job_queue.latest(owner, kind, limit=1)
+    if jobs:
+        st.session_state[key] = jobs[0]["id"]
+        return jobs[0]
+    return None
+
+
+def start_job(kind: str, owner: str, payload: dict) -> None:
+    """Envia o job para os workers e passa a acompanhá-lo."""
+    st.session_state[f"job_{kind}"] = job_queue.submit(kind, owner, payload)
+    st.rerun()
+
+
+def poll_again() -> None:
+    """Espera alguns segundos e recarrega a página para atualizar o status do job."""
+    time.sleep(POLL_SECONDS)
+    st.rerun()
+
+
+def render_failure(job: dict) -> None:
+    """Mostra o erro do job e permite devolvê-lo para a fila."""
+    st.error(f"⚠️ O processamento falhou: {job['error']}")
+    if st.button("🔁 Tentar novamente", use_container_width=True):
+        job_queue.retry(job["id"])
+        st.rerun()
@@ -0,0 +1,105 @@
+"""
+Pool de workers que executa os jobs enviados pelas páginas.
+
+Uso (a partir do diretório do app, onde ficam os secrets do Streamlit):
+    python -m jobs.worker --processes 4
+    python -m jobs.worker --processes 1 --kinds summary   # ex.: uma máquina só para a diarização
+"""
+import argparse
+import multiprocessing
+import threading
+import time
+import traceback
+
+import streamlit as st
+
+from jobs.handlers import HANDLERS
+from jobs.job_queue import JobQueue, purge_stale_job_files
+
+HEARTBEAT_INTERVAL = 30
+
+# Intervalo, em segundos, entre as limpezas de arquivos de jobs abandonados (feitas com a fila vazia)
+PURGE_INTERVAL = 3600
+
+# Jobs que rodam Whisper e pyannote no próprio processo (quando não há servidor de modelos)
+LOCAL_MODEL_KINDS = {"summary"}
+
+
+def execute(queue: JobQueue, job: dict) -> None:
+    """Executa um job, mantendo o heartbeat enquanto roda, e grava o resultado ou o erro."""
+    job_id, attempt = job["id"], job["attempts"]
+    stop = threading.Event()
+
+    def heartbeat(progress=None):
+        # Uma falha momentânea do banco não pode parar o heartbeat (o job seria retomado por outro worker)
+        try:
+            queue.heartbeat(job_id, attempt, progress)
+        except Exception:
+            traceback.print_exc()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            heartbeat()
+
+    threading.Thread(target=beat, daemon=True).start()
+    print(f"Job {job_id} ({job['kind']}) iniciado")
+    try:
+        result = HANDLERS[job["kind"]](job["payload"], heartbeat)
+        queue.complete(job_id, attempt, result)
+        print(f"Job {job_id} concluído")
+    except Exception as e:
+        traceback.print_exc()
+        queue.fail(job_id, attempt, str(e))
+    finally:
+        stop.set()
+
+
+def warm_up(kinds: list[str]) -> None:
+    """Pré-carrega os modelos de MODEL_WARMUP se este worker executa jobs com modelos locais."""
+    if LOCAL_MODEL_KINDS.intersection(kinds) and not st.secrets.get("MODEL_SERVER_URL"):
+        from text_extractor.models import warm_up_from_settings
+
+        warm_up_from_settings()
+
+
+def work(kinds: list[str], poll_interval: float) -> None:
+    """Loop de um worker: retira jobs da fila e os executa, um de cada vez."""
+    warm_up(kinds)
+    queue = JobQueue()
+    last_purge = 0.0
+    while True:
+        try:
+            job = queue.claim(kinds)
+        except Exception:
+            traceback.print_exc()
+            job = None
+
+        if job is None:
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                purge_stale_job_files()
+                last_purge = time.monotonic()
+            time.sleep(poll_interval)
+            continue
+        execute(queue, job)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Workers da fila de jobs do CognitAI")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--kinds", nargs="+", default=list(HANDLERS), choices=list(HANDLERS))
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    processes = [
+        multiprocessing.Process(target=work, args=(args.kinds, args.poll_interval), name=f"worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    print(f"{len(processes)} workers aguardando jobs: {', '.join(args.kinds)}")
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
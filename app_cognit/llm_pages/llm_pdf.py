@@ -3,12 +3,7 @@ import fitz  # PyMuPDF para PDFs digitais
 import pytesseract
 from PIL import Image
 import io
-from openai import OpenAI
-
-OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
-
-# Configuração da API OpenAI
-client = OpenAI(api_key=OPENAI_API_KEY)
+from jobs.ui import current_job, poll_again, render_failure, start_job
 
 def extract_text_from_pdf(uploaded_file):
     """Extrai texto de um PDF digital."""
@@ -25,50 +20,23 @@ def convert_pdf_to_images(uploaded_file):
     with fitz.open(stream=uploaded_file.read(), filetype="pdf") as doc:
         return [Image.open(io.BytesIO(page.get_pixmap().tobytes("png"))) for page in doc]
 
-def split_text(text, max_tokens=4000):
-    """Divide um texto longo em chunks menores para processamento eficiente."""
-    words = text.split()
-    chunks, current_chunk = [], []
-    current_length = 0
-    
-    for word in words:
-        if current_length + len(word) + 1 > max_tokens:
-            chunks.append(" ".join(current_chunk))
-            current_chunk, current_length = [], 0
-        current_chunk.append(word)
-        current_length += len(word) + 1
-    
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-    
-    return chunks
-
-def chat_with_llm(prompt, context):
-    """Interage com o modelo LLM processando o contexto em chunks para evitar limites de tokens."""
-    text_chunks = split_text(context, max_tokens=4000)
-    responses = []
-    
-    for chunk in text_chunks:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Você é um assistente especializado em processamento de PDFs."},
-                {"role": "user", "content": f"{chunk}\n\n{prompt}"}
-            ],
-            temperature=0.7
-        )
-        responses.append(response.choices[0].message.content)
-    
-    return "\n---\n".join(responses)
-
 # Interface Streamlit
 st.title("📄 Agente LLM para PDFs")
 
+email = st.session_state.get("user_email", None)
+if not email:
+    st.warning("⚠️ Você precisa estar logado para usar o agente.")
+    st.stop()
+
 uploaded_file = st.file_uploader("Envie um arquivo PDF", type=["pdf"])
 
 if uploaded_file:
-    st.write("### Extraindo texto...")
-    text = extract_text_from_pdf(uploaded_file) or extract_text_from_scanned_pdf(uploaded_file)
+    # 🔹 O texto é extraído uma vez por arquivo; a página recarrega a cada POLL_SECONDS enquanto o job roda
+    if st.session_state.get("pdf_text_file_id") != uploaded_file.file_id:
+        st.write("### Extraindo texto...")
+        st.session_state["pdf_text"] = extract_text_from_pdf(uploaded_file) or extract_text_from_scanned_pdf(uploaded_file)
+        st.session_state["pdf_text_file_id"] = uploaded_file.file_id
+    text = st.session_state["pdf_text"]
     
     if text:
         st.text_area("Texto extraído:", text[:1000] + "... (Texto truncado)" if len(text) > 1000 else text, height=300)
@@ -77,8 +45,18 @@ if uploaded_file:
         user_input = st.text_area("Faça uma pergunta ou peça uma ação (ex: Resuma o documento, Gere 5 perguntas de múltipla escolha)")
         
         if st.button("Enviar") and user_input:
-            response = chat_with_llm(user_input, text)
-            st.write("### Resposta do LLM:")
-            st.write(response)
+            # O documento é processado por seções nos workers (jobs.worker)
+            start_job("pdf_agent", email, {"text": text, "prompt": user_input})
     else:
         st.error("Não foi possível extrair texto do PDF.")
+
+job = current_job("pdf_agent", email)
+if job is not None:
+    if job["status"] in ("queued", "running"):
+        st.info("⏳ Processando o pedido...")
+        poll_again()
+    elif job["status"] == "failed":
+        render_failure(job)
+    else:
+        st.write("### Resposta do LLM:")
+        st.write(job["result"]["response"])
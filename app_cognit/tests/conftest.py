@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Os módulos do app são importados a partir do diretório app_cognit (como no Streamlit e nos workers)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,86 @@
+"""
+Saídas fixadas da implementação original (janela deslizante) de
+find_longest_common_sequence e merge_transcripts, geradas antes da troca
+pelo alinhamento vetorizado de conversor_audio.alignment.
+"""
+import pytest
+
+from conversor_audio.alignment import _sliding_window_merge, find_longest_common_sequence
+
+WORD_CASES = [
+    (
+        ["O rato roeu a roupa do rei de Roma", "roupa do rei de Roma e depois fugiu para longe"],
+        "O rato roeu a roupa do rei de Roma e depois fugiu para longe",
+    ),
+    # Sem nenhuma palavra em comum: as sequências são concatenadas
+    (["primeira parte sem nada", "outra frase diferente aqui"], "primeira parte sem nadaoutra frase diferente aqui"),
+    # Uma única coincidência não basta (mínimo de 2)
+    (["um dois tres", "tres quatro cinco"], "um dois trestres quatro cinco"),
+    (
+        [" e então ela disse que voltaria amanhã cedo", " voltaria amanhã cedo para buscar os papéis",
+         " buscar os papéis e assinar o contrato."],
+        " e então ela disse que voltaria amanhã cedo para buscar os papéis e assinar o contrato.",
+    ),
+    (["apenas uma sequência"], "apenas uma sequência"),
+    ([], ""),
+]
+
+CHARACTER_CASES = [
+    (["transcrição automática", "automática de áudio"], "transcrição automática de áudio"),
+    (["abc", "xyz"], "abcxyz"),
+    (["abcd", "dxyz"], "abcddxyz"),
+    (["banana", "ananas"], "bananas"),
+    (["o gato subiu no telhado", "no telhado e desceu", "desceu pela escada"], "o gato subiu no telhado e desceu pela escada"),
+]
+
+
+@pytest.mark.parametrize("sequences, expected", WORD_CASES)
+def test_merge_by_words(sequences, expected):
+    assert find_longest_common_sequence(sequences) == expected
+    assert _sliding_window_merge(sequences) == expected
+
+
+@pytest.mark.parametrize("sequences, expected", CHARACTER_CASES)
+def test_merge_by_characters(sequences, expected):
+    assert find_longest_common_sequence(sequences, match_by_words=False) == expected
+    assert _sliding_window_merge(sequences, match_by_words=False) == expected
+
+
+def test_merge_transcripts():
+    # O transcriber depende do Streamlit e do Groq no nível do módulo
+    pytest.importorskip("streamlit")
+    pytest.importorskip("groq")
+    from conversor_audio.transcriber import merge_transcripts
+
+    results = [
+        ({"text": "x", "segments": [
+            {"id": 0, "start": 0.0, "end": 4.0, "text": " Bom dia a todos.", "avg_logprob": -0.2},
+            {"id": 1, "start": 4.0, "end": 9.5, "text": " Hoje vamos falar sobre o orçamento", "avg_logprob": -0.3},
+            {"id": 2, "start": 9.5, "end": 12.0, "text": " do próximo ano fiscal", "avg_logprob": -0.25},
+        ]}, 0),
+        ({"text": "y", "segments": [
+            {"id": 0, "start": 0.0, "end": 3.0, "text": " o orçamento do próximo ano fiscal", "avg_logprob": -0.1},
+            {"id": 1, "start": 3.0, "end": 7.0, "text": " e das metas da equipe.", "avg_logprob": -0.2},
+            {"id": 2, "start": 7.0, "end": 11.0, "text": " Alguma pergunta", "avg_logprob": -0.4},
+        ]}, 9000),
+        ({"text": "z", "segments": [
+            {"id": 0, "start": 0.0, "end": 2.0, "text": " Alguma pergunta antes de começarmos?", "avg_logprob": -0.2},
+            {"id": 1, "start": 2.0, "end": 5.0, "text": " Então vamos lá.", "avg_logprob": -0.1},
+        ]}, 15000),
+    ]
+
+    merged = merge_transcripts(results)
+
+    assert merged["segments"] == [
+        {"id": 0, "start": 0.0, "end": 4.0, "text": " Bom dia a todos.", "avg_logprob": -0.2},
+        {"id": 1, "start": 4.0, "end": 3.0, "text": " Hoje vamos falar sobre o orçamento  do próximo ano fiscal", "avg_logprob": -0.3},
+        {"id": 0, "start": 0.0, "end": 3.0, "text": " o orçamento do próximo ano fiscal", "avg_logprob": -0.1},
+        {"id": 1, "start": 3.0, "end": 7.0, "text": " e das metas da equipe.", "avg_logprob": -0.2},
+        {"id": 2, "start": 7.0, "end": 2.0, "text": " Alguma pergunta antes de começarmos?", "avg_logprob": -0.4},
+        {"id": 0, "start": 0.0, "end": 2.0, "text": " Alguma pergunta antes de começarmos?", "avg_logprob": -0.2},
+        {"id": 1, "start": 2.0, "end": 5.0, "text": " Então vamos lá.", "avg_logprob": -0.1},
+    ]
+    assert merged["text"] == (
+        " Bom dia a todos.  Hoje vamos falar sobre o orçamento  do próximo ano fiscal  o orçamento do próximo ano fiscal"
+        "  e das metas da equipe.  Alguma pergunta antes de começarmos?  Alguma pergunta antes de começarmos?  Então vamos lá."
+    )
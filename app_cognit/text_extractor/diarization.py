@@ -0,0 +1,82 @@
+from bisect import bisect_left
+
+
+class TurnIndex:
+    """
+    Índice de intervalos dos turnos de fala da diarização.
+
+    Os turnos são ordenados pelo início e guardam o maior fim visto até cada
+    posição, então a busca dos turnos que cobrem um trecho só percorre os
+    candidatos que realmente podem se sobrepor a ele.
+    """
+
+    def __init__(self, turns: list[tuple[float, float, str]]):
+        self.turns = sorted(turns)
+        self.starts = [start for start, _, _ in self.turns]
+        self.max_ends = []
+        max_end = float("-inf")
+        for _, end, _ in self.turns:
+            max_end = max(max_end, end)
+            self.max_ends.append(max_end)
+
+    def speaker_at(self, start: float, end: float) -> str | None:
+        """Retorna o falante com maior sobreposição com o trecho [start, end], ou o turno mais próximo."""
+        if not self.turns:
+            return None
+
+        overlaps = {}
+        i = bisect_left(self.starts, end) - 1
+        while i >= 0 and self.max_ends[i] > start:
+            turn_start, turn_end, speaker = self.turns[i]
+            overlap = min(end, turn_end) - max(start, turn_start)
+            if overlap > 0:
+                overlaps[speaker] = overlaps.get(speaker, 0.0) + overlap
+            i -= 1
+
+        if overlaps:
+            return max(overlaps, key=overlaps.get)
+
+        # Trecho em silêncio segundo a diarização: usa o turno mais próximo
+        i = bisect_left(self.starts, start)
+        candidates = self.turns[max(0, i - 1):i + 1]
+        return min(candidates, key=lambda turn: max(turn[0] - end, start - turn[1], 0))[2]
+
+
+def assign_speakers(segments: list[dict], turns: list[tuple[float, float, str]]) -> list[dict]:
+    """
+    Atribui cada segmento do Whisper ao falante que mais fala durante ele.
+
+    Segmentos consecutivos do mesmo falante são agrupados, então cada trecho
+    da transcrição aparece exatamente uma vez.
+
+    Args:
+        segments: Segmentos do Whisper (com "start", "end" e "text")
+        turns: Turnos da diarização como (início, fim, falante)
+
+    Returns:
+        list[dict]: Falas com "speaker", "start", "end" e "text"
+    """
+    index = TurnIndex(turns)
+    utterances = []
+
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+
+        speaker = index.speaker_at(segment["start"], segment["end"]) or "Desconhecido"
+        if utterances and utterances[-1]["speaker"] == speaker:
+            utterances[-1]["text"] += f" {text}"
+            utterances[-1]["end"] = segment["end"]
+        else:
+            utterances.append({"speaker": speaker, "start": segment["start"], "end": segment["end"], "text": text})
+
+    return utterances
+
+
+def format_structured_transcript(utterances: list[dict]) -> str:
+    """Formata as falas como diálogo, uma linha por fala, na ordem em que aconteceram."""
+    return "\n".join(
+        f"**{u['speaker']}** [{u['start']:.2f}s - {u['end']:.2f}s]: {u['text']}"
+        for u in utterances
+    )
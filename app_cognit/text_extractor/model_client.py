@@ -0,0 +1,78 @@
+import json
+import os
+import urllib.error
+import urllib.request
+
+import streamlit as st
+
+from text_extractor.models import registry
+
+
+class LocalModels:
+    """Executa transcrição e diarização no próprio processo, pelo registro de modelos."""
+
+    def transcribe(self, audio_path: str) -> dict:
+        """Transcreve o áudio com o Whisper e retorna o resultado (texto e segmentos)."""
+        with registry.use("whisper") as whisper_model:
+            return whisper_model.transcribe(audio_path)
+
+    def diarize(self, audio_path: str) -> list[tuple[float, float, str]]:
+        """Separa os falantes do áudio e retorna os turnos como (início, fim, falante)."""
+        with registry.use("diarization") as pipeline:
+            diarization = pipeline(audio_path)
+        return [(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)]
+
+    def is_ready(self) -> bool:
+        return registry.is_loaded("whisper") and registry.is_loaded("diarization")
+
+
+class RemoteModels:
+    """
+    Cliente do servidor de modelos local (text_extractor.model_server).
+
+    Os pesos ficam em um único processo por máquina; as páginas enviam apenas
+    o caminho do arquivo, que precisa estar acessível pelo servidor.
+    """
+
+    def __init__(self, url: str, timeout: float = 3600):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, endpoint: str, audio_path: str):
+        payload = json.dumps({"path": os.path.abspath(audio_path)}).encode()
+        request = urllib.request.Request(
+            f"{self.url}/{endpoint}", data=payload, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            # O servidor responde 500 com {"error": ...} quando o modelo falha
+            try:
+                message = json.loads(e.read())["error"]
+            except (ValueError, KeyError, TypeError):
+                message = f"HTTP {e.code}"
+            raise RuntimeError(f"Erro no servidor de modelos: {message}") from e
+        except urllib.error.URLError as e:
+            raise RuntimeError(
+                f"Servidor de modelos indisponível em {self.url} ({e.reason}); "
+                "verifique se `python -m text_extractor.model_server` está rodando."
+            ) from e
+        return data["result"]
+
+    def transcribe(self, audio_path: str) -> dict:
+        """Transcreve o áudio com o Whisper e retorna o resultado (texto e segmentos)."""
+        return self._post("transcribe", audio_path)
+
+    def diarize(self, audio_path: str) -> list[tuple[float, float, str]]:
+        """Separa os falantes do áudio e retorna os turnos como (início, fim, falante)."""
+        return [tuple(turn) for turn in self._post("diarize", audio_path)]
+
+    def is_ready(self) -> bool:
+        return True
+
+
+def get_models():
+    """Usa o servidor de modelos se `MODEL_SERVER_URL` estiver configurado, senão carrega no processo."""
+    url = st.secrets.get("MODEL_SERVER_URL")
+    return RemoteModels(url) if url else LocalModels()
@@ -0,0 +1,111 @@
+"""
+Servidor local de modelos (Whisper e pyannote) compartilhado pelos workers do Streamlit.
+
+Uso:
+    python -m text_extractor.model_server --host 127.0.0.1 --port 8765
+
+As páginas passam a usá-lo ao configurar `MODEL_SERVER_URL = "http://127.0.0.1:8765"`
+nos secrets. Os pesos são carregados uma única vez por máquina e as requisições
+entram em uma fila por modelo, executada por uma única thread.
+"""
+import argparse
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from text_extractor.model_client import LocalModels
+from text_extractor.models import registry
+
+
+class ModelQueue:
+    """
+    Fila de requisições de um modelo, executadas uma de cada vez por uma thread.
+
+    As requisições HTTP chegam em threads separadas, mas só a thread da fila
+    usa o modelo, então a GPU/CPU não é disputada por várias inferências ao
+    mesmo tempo. Whisper e pyannote recebem um arquivo por chamada (áudios de
+    tamanhos diferentes não formam um lote), então não há agrupamento.
+    """
+
+    def __init__(self, name: str, handler):
+        self.name = name
+        self.handler = handler
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name=f"batch-{name}", daemon=True).start()
+
+    def submit(self, audio_path: str) -> Future:
+        future = Future()
+        self._queue.put((audio_path, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            audio_path, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.handler(audio_path))
+            except Exception as e:
+                future.set_exception(e)
+
+
+def make_handler(queues: dict[str, ModelQueue]):
+    class ModelRequestHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            payload = json.dumps(body, default=float).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "loaded": [name for name in queues if registry.is_loaded(name)]})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            endpoint = self.path.strip("/")
+            target = {"transcribe": "whisper", "diarize": "diarization"}.get(endpoint)
+            if target is None:
+                self._reply(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                audio_path = json.loads(self.rfile.read(length))["path"]
+                result = queues[target].submit(audio_path).result()
+                self._reply(200, {"result": result})
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+
+    return ModelRequestHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor local de modelos Whisper e pyannote")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warm-up", action="store_true", help="Carrega os modelos antes de aceitar requisições")
+    args = parser.parse_args()
+
+    models = LocalModels()
+    # LocalModels reserva o modelo no registro (registry.use) a cada chamada
+    queues = {
+        "whisper": ModelQueue("whisper", models.transcribe),
+        "diarization": ModelQueue("diarization", models.diarize),
+    }
+
+    if args.warm_up:
+        registry.warm_up(list(queues)).join()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(queues))
+    print(f"Servidor de modelos em http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
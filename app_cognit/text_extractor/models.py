@@ -0,0 +1,140 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+# 🔹 Configuração de modelos
+WHISPER_MODEL = "large-v2"
+DIARIZATION_MODEL = "pyannote/speaker-diarization"
+
+
+class ModelRegistry:
+    """
+    Registro de modelos compartilhado pelo processo inteiro.
+
+    Cada modelo é carregado uma única vez, na primeira utilização, e fica
+    disponível para todas as sessões do Streamlit (o módulo é importado uma
+    vez por processo). Modelos sem uso há mais de `idle_timeout` segundos são
+    descarregados por uma thread de limpeza.
+    """
+
+    def __init__(self, idle_timeout: float | None = None):
+        self.idle_timeout = idle_timeout
+        self._loaders = {}
+        self._models = {}
+        self._last_used = {}
+        self._load_locks = {}
+        self._use_locks = {}
+        self._lock = threading.Lock()
+        self._janitor = None
+
+    def register(self, name: str, loader) -> None:
+        """Registra a função que carrega o modelo `name` (sem carregá-lo)."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks[name] = threading.Lock()
+            self._use_locks[name] = threading.RLock()
+
+    def get(self, name: str):
+        """Retorna o modelo `name`, carregando-o apenas na primeira chamada."""
+        model = self._models.get(name)
+        if model is None:
+            with self._load_locks[name]:
+                # Outra thread pode ter carregado o modelo enquanto esperávamos
+                model = self._models.get(name)
+                if model is None:
+                    model = self._loaders[name]()
+                    self._models[name] = model
+                    self._start_janitor()
+        self._last_used[name] = time.monotonic()
+        return model
+
+    @contextmanager
+    def use(self, name: str):
+        """
+        Usa o modelo `name` com acesso exclusivo.
+
+        A inferência do Whisper altera o estado do modelo (hooks de cache), por
+        isso as chamadas de sessões diferentes são serializadas, e um modelo em
+        uso nunca é descarregado.
+        """
+        with self._use_locks[name]:
+            try:
+                yield self.get(name)
+            finally:
+                self._last_used[name] = time.monotonic()
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm_up(self, names) -> threading.Thread:
+        """Carrega os modelos `names` em segundo plano (ex.: ao iniciar o servidor)."""
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Erro ao pré-carregar o modelo {name}: {e}")
+
+        thread = threading.Thread(target=load_all, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def evict_idle(self) -> None:
+        """Descarrega os modelos sem uso há mais de `idle_timeout` segundos."""
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        for name in list(self._models):
+            if now - self._last_used.get(name, now) < self.idle_timeout:
+                continue
+            # Não bloqueia: se o modelo estiver em uso, tenta de novo na próxima rodada
+            if self._use_locks[name].acquire(blocking=False):
+                try:
+                    self._models.pop(name, None)
+                    print(f"Modelo {name} descarregado por inatividade")
+                finally:
+                    self._use_locks[name].release()
+
+    def _start_janitor(self) -> None:
+        if not self.idle_timeout or self._janitor is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(max(1.0, self.idle_timeout / 4))
+                self.evict_idle()
+
+        self._janitor = threading.Thread(target=run, name="model-janitor", daemon=True)
+        self._janitor.start()
+
+
+def _load_whisper():
+    import whisper
+    return whisper.load_model(WHISPER_MODEL)
+
+
+def _load_diarization():
+    from pyannote.audio import Pipeline
+    return Pipeline.from_pretrained(DIARIZATION_MODEL, use_auth_token=st.secrets["PYANNOTE_AUTH_TOKEN"])
+
+
+registry = ModelRegistry(idle_timeout=st.secrets.get("MODEL_IDLE_TIMEOUT", 3600))
+registry.register("whisper", _load_whisper)
+registry.register("diarization", _load_diarization)
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+
+def warm_up_from_settings() -> None:
+    """Pré-carrega os modelos listados em `MODEL_WARMUP` nos secrets, uma vez por processo."""
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+    names = st.secrets.get("MODEL_WARMUP", [])
+    if names:
+        registry.warm_up(names)
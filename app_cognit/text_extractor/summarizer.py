@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import tiktoken
+except ImportError:  # Sem tiktoken, estima ~4 caracteres por token
+    tiktoken = None
+
+SUMMARY_CACHE_DIR = Path("summary_cache")
+SUMMARY_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """Conta os tokens do texto para o modelo (ou estima, se o tiktoken não estiver instalado)."""
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return len(encoding.encode(text))
+
+
+def split_sections(text: str, max_tokens: int, model: str = "gpt-4") -> list[str]:
+    """
+    Divide o texto em seções de até `max_tokens`, sem cortar linhas.
+
+    Cortar por linha mantém cada fala da transcrição estruturada inteira.
+    Depois de meia seção, o corte acontece em linhas "âncora" escolhidas pelo
+    hash do conteúdo, então os limites das seções seguintes não se deslocam
+    quando uma linha é editada e uma pequena edição altera apenas a seção em
+    que ocorreu. Linhas maiores que o limite são divididas por palavras, e
+    palavras maiores que o limite, por caracteres.
+    """
+    sections, current, current_tokens = [], [], 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            sections.append("\n".join(current))
+        current, current_tokens = [], 0
+
+    for line in text.splitlines():
+        tokens = count_tokens(line, model)
+        if tokens > max_tokens:
+            flush()
+            # Contagem acumulada: cada palavra é contada uma vez, com o espaço que a precede
+            piece, piece_tokens = [], 0
+            for word in _split_words(line, max_tokens, model):
+                word_tokens = count_tokens(" " + word if piece else word, model)
+                if piece and piece_tokens + word_tokens > max_tokens:
+                    sections.append(" ".join(piece))
+                    piece, piece_tokens, word_tokens = [], 0, count_tokens(word, model)
+                piece.append(word)
+                piece_tokens += word_tokens
+            if piece:
+                current, current_tokens = [" ".join(piece)], count_tokens(" ".join(piece), model)
+            continue
+
+        if current_tokens + tokens > max_tokens:
+            flush()
+        current.append(line)
+        current_tokens += tokens
+
+        if current_tokens >= max_tokens // 2 and _is_anchor(line):
+            flush()
+
+    flush()
+    return sections
+
+
+def _split_words(line: str, max_tokens: int, model: str):
+    """Palavras da linha; as que passam de `max_tokens` sozinhas são cortadas em partes que cabem."""
+    for word in line.split():
+        while count_tokens(word, model) > max_tokens:
+            # Maior prefixo que cabe no limite (busca binária pelo tamanho)
+            low, high = 1, len(word) - 1
+            while low < high:
+                middle = (low + high + 1) // 2
+                if count_tokens(word[:middle], model) <= max_tokens:
+                    low = middle
+                else:
+                    high = middle - 1
+            yield word[:low]
+            word = word[low:]
+        yield word
+
+
+def _is_anchor(line: str) -> bool:
+    return hashlib.md5(line.encode()).digest()[0] % 8 == 0
+
+
+class SummaryCache:
+    """
+    Cache em disco dos resumos parciais, indexado pelo hash do prompt e do texto.
+
+    Cada entrada é um arquivo JSON; leituras atualizam a data de modificação e
+    gravações removem as entradas usadas há mais tempo até o diretório caber
+    em `max_bytes`.
+    """
+
+    def __init__(self, directory: Path = SUMMARY_CACHE_DIR, max_bytes: int = SUMMARY_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, prompt: str, text: str) -> str:
+        return hashlib.sha256(json.dumps([model, prompt, text]).encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        path = self.directory / f"{key}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        try:
+            os.utime(path)  # Marca a entrada como usada recentemente
+        except FileNotFoundError:
+            pass
+        return summary
+
+    def put(self, key: str, summary: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False) as f:
+            json.dump(summary, f, ensure_ascii=False)
+        os.replace(f.name, self.directory / f"{key}.json")
+
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+
+class MapReduceSummarizer:
+    """
+    Resume textos longos em etapas, respeitando a janela de contexto do modelo.
+
+    O texto é dividido em seções de até `section_tokens` tokens, resumidas em
+    paralelo (map). Os resumos parciais são agrupados e resumidos de novo até
+    caberem em uma única chamada (reduce). Cada chamada é guardada em cache,
+    então uma nova execução após uma pequena edição só refaz as seções que
+    mudaram e os níveis acima delas.
+    """
+
+    def __init__(self, client, model: str = "gpt-4", section_tokens: int = 3000, max_workers: int = 4, temperature: float | None = None, cache: SummaryCache | None = None):
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.section_tokens = section_tokens
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else SummaryCache()
+
+    def _complete(self, prompt: str, text: str) -> str:
+        key = SummaryCache.key(self.model, prompt, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        options = {"temperature": self.temperature} if self.temperature is not None else {}
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "system", "content": prompt},
+                      {"role": "user", "content": text}],
+            **options
+        )
+        summary = response.choices[0].message.content
+        self.cache.put(key, summary)
+        return summary
+
+    def _map(self, prompt: str, sections: list[str]) -> list[str]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda section: self._complete(prompt, section), sections))
+
+    def summarize(self, text: str, prompt: str, combine_prompt: str | None = None) -> str:
+        """
+        Resume `text` com o `prompt`, em uma chamada se couber, senão com map-reduce.
+
+        Args:
+            text: Texto a resumir
+            prompt: Instrução (mensagem de sistema) aplicada a cada seção
+            combine_prompt: Instrução usada para combinar resumos parciais
+
+        Returns:
+            str: Resumo final
+        """
+        if count_tokens(text, self.model) <= self.section_tokens:
+            return self._complete(prompt, text)
+
+        combine_prompt = combine_prompt or (
+            f"{prompt}\nOs textos abaixo são resumos parciais de partes consecutivas do mesmo conteúdo; "
+            "combine-os em uma única resposta coerente."
+        )
+
+        partials = self._map(prompt, split_sections(text, self.section_tokens, self.model))
+
+        # Reduce hierárquico: agrupa resumos parciais até caberem em uma única chamada
+        while len(partials) > 1:
+            groups = self._group(partials)
+            if len(groups) == 1:
+                return self._complete(combine_prompt, "\n\n---\n\n".join(groups[0]))
+            partials = self._map_groups(combine_prompt, groups)
+
+        return partials[0]
+
+    def _group(self, partials: list[str]) -> list[list[str]]:
+        groups, current, current_tokens = [], [], 0
+        for partial in partials:
+            tokens = count_tokens(partial, self.model)
+            if current and current_tokens + tokens > self.section_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(partial)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+
+        # Garante que cada nível reduza a quantidade de resumos
+        if len(groups) == len(partials):
+            groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+        return groups
+
+    def _map_groups(self, prompt: str, groups: list[list[str]]) -> list[str]:
+        # Grupos com um único resumo passam direto para o próximo nível
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(
+                lambda group: group[0] if len(group) == 1 else self._complete(prompt, "\n\n---\n\n".join(group)),
+                groups
+            ))
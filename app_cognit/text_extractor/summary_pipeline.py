@@ -0,0 +1,125 @@
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pydub import AudioSegment
+
+from text_extractor.diarization import assign_speakers, format_structured_transcript
+from text_extractor.summarizer import MapReduceSummarizer
+
+SUMMARY_PROMPT = "Resuma a seguinte transcrição de uma reunião de forma clara e objetiva."
+
+
+def run_stages(stages: dict, max_workers: int = 4, on_stage_done=None) -> tuple[dict, dict]:
+    """
+    Executa etapas com dependências explícitas, em paralelo sempre que possível.
+
+    Cada etapa começa assim que todas as suas dependências terminam; etapas
+    independentes rodam ao mesmo tempo em threads separadas.
+
+    Args:
+        stages: nome -> (lista de dependências, função que recebe os resultados das dependências)
+        max_workers: Número máximo de etapas simultâneas
+        on_stage_done: Chamado como on_stage_done(nome, segundos) ao fim de cada etapa
+
+    Returns:
+        tuple: (resultados por etapa, duração em segundos por etapa)
+    """
+    results, timings = {}, {}
+    pending = dict(stages)
+    running = {}
+
+    def timed(fn, inputs):
+        start = time.perf_counter()
+        result = fn(**inputs)
+        return result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            # Dispara todas as etapas cujas dependências já terminaram
+            for name, (deps, fn) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    inputs = {dep: results[dep] for dep in deps}
+                    running[executor.submit(timed, fn, inputs)] = name
+                    del pending[name]
+
+            if not running:
+                raise RuntimeError(f"Dependências não satisfeitas: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name], timings[name] = future.result()
+                if on_stage_done:
+                    on_stage_done(name, timings[name])
+
+    return results, timings
+
+
+def preprocess_audio(audio_path: str) -> str:
+    """Converte o áudio para WAV 16kHz mono, o formato usado pelo Whisper e pelo pyannote."""
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+        wav_path = temp_file.name
+    try:
+        AudioSegment.from_file(audio_path).set_frame_rate(16000).set_channels(1).export(wav_path, format="wav")
+    except Exception:
+        os.remove(wav_path)
+        raise
+    return wav_path
+
+
+def summarize_recording(audio_path: str, models, client, on_stage_done=None) -> dict:
+    """
+    Gera a transcrição estruturada por falante e o resumo de uma gravação.
+
+    Diarização e transcrição dependem apenas do áudio pré-processado e rodam
+    em paralelo; o alinhamento começa quando as duas terminam, e o resumo
+    logo em seguida.
+
+    Args:
+        audio_path: Caminho do áudio enviado
+        models: LocalModels ou RemoteModels (text_extractor.model_client)
+        client: Cliente OpenAI usado no resumo
+        on_stage_done: Chamado como on_stage_done(nome, segundos) ao fim de cada etapa
+
+    Returns:
+        dict: "structured_transcript", "resumo" e "timings" (segundos por etapa)
+    """
+    summarizer = MapReduceSummarizer(client)
+
+    def summarize(align):
+        # Transcrições longas são resumidas por seções em paralelo e depois combinadas
+        return summarizer.summarize(align, SUMMARY_PROMPT)
+
+    temp_paths = []
+
+    def preprocess():
+        wav_path = preprocess_audio(audio_path)
+        temp_paths.append(wav_path)
+        return wav_path
+
+    stages = {
+        "preprocess": ([], preprocess),
+        "diarize": (["preprocess"], lambda preprocess: models.diarize(preprocess)),
+        "transcribe": (["preprocess"], lambda preprocess: models.transcribe(preprocess)),
+        "align": (["diarize", "transcribe"], lambda diarize, transcribe: format_structured_transcript(
+            assign_speakers(transcribe["segments"], diarize)
+        )),
+        "summarize": (["align"], summarize),
+    }
+
+    try:
+        results, timings = run_stages(stages, on_stage_done=on_stage_done)
+    finally:
+        # 🔹 Remover o WAV temporário mesmo em caso de erro
+        for wav_path in temp_paths:
+            if os.path.exists(wav_path):
+                os.remove(wav_path)
+
+    print("Tempos por etapa: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items()))
+    return {
+        "structured_transcript": results["align"],
+        "resumo": results["summarize"],
+        "timings": timings,
+    }
@@ -2,13 +2,13 @@ import os
 import re
 import openai
 from langdetect import detect
-from openai import OpenAI
 from dotenv import load_dotenv
+from clients import get_openai
 
 load_dotenv()
 
-# Inicializa o cliente OpenAI com a chave da API
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Cliente OpenAI compartilhado pelo processo
+client = get_openai()
 
 
 def save_uploaded_file(uploaded_file, save_path="temp_image.png"):